@@ -1,12 +1,19 @@
 import streamlit as st
 import streamlit.components.v1 as components
 import os
-import tempfile
+import uuid
+import hashlib
+import time
+import sqlite3
 from quiz_generator import QuizGenerator
+from quiz_cache import QuizCache
+from quiz_store import QuizStore
+from rate_limiter import RequestScheduler
+from resilience import CircuitBreaker
 from document_processor import DocumentProcessor
 from styles import apply_custom_styles
-import pandas as pd
-from io import StringIO, BytesIO
+from exporters import EXPORT_WRITERS, create_print_version
+import metrics
 import json
 
 # Apply custom styling
@@ -15,10 +22,71 @@ apply_custom_styles()
 # Initialize session state
 if 'quiz_data' not in st.session_state:
     st.session_state.quiz_data = None
+    st.session_state.quiz_version = None
+    st.session_state.quiz_document = None
 if 'processed_text' not in st.session_state:
     st.session_state.processed_text = None
+    st.session_state.document_hash = None
+    st.session_state.upload_id = None
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+@st.cache_resource
+def get_quiz_cache():
+    """Quiz cache shared by every session in this server process"""
+    return QuizCache(os.getenv("QUIZ_CACHE_DIR", ".quiz_cache"))
+
+@st.cache_resource
+def get_quiz_store():
+    """Persistent store of documents and quizzes shared by every session"""
+    return QuizStore(os.getenv("QUIZ_STORE_PATH", "quiz_store.sqlite3"))
+
+@st.cache_resource
+def get_request_scheduler():
+    """Rate limiter shared by every session, sized to the API key's per-minute quotas"""
+    return RequestScheduler(
+        requests_per_minute=int(os.getenv("GEMINI_RPM", "15")),
+        tokens_per_minute=int(os.getenv("GEMINI_TPM", "1000000"))
+    )
+
+@st.cache_resource
+def get_circuit_breaker():
+    """Circuit breaker shared by every session so an outage is detected once, not per click"""
+    return CircuitBreaker()
+
+@st.cache_resource
+def get_document_processor():
+    """Document processor whose extraction cache is shared across reruns and sessions"""
+    # Keep the whole document; QuizGenerator picks the relevant chunks for each prompt
+    return DocumentProcessor(cache_dir=os.getenv("EXTRACTION_CACHE_DIR"), max_chars=None)
+
+def set_quiz(quiz_data, document_hash):
+    """Make quiz_data (generated from the document with document_hash) the current quiz, versioned by a hash of its content"""
+    st.session_state.quiz_data = quiz_data
+    st.session_state.quiz_document = document_hash
+    # Hashed once here so reruns of the review tab never re-serialize the quiz
+    st.session_state.quiz_version = hashlib.sha256(json.dumps(quiz_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def build_export(quiz_version, export_format, _quiz_data):
+    """Export file content, built once per quiz version and format (_quiz_data is not hashed)"""
+    return "".join(EXPORT_WRITERS[export_format](_quiz_data))
+
+@st.cache_resource
+def setup_metrics():
+    """Install the process-wide metrics exporter chosen by the environment, once per server"""
+    statsd_address = os.getenv("METRICS_STATSD")
+    prometheus_port = os.getenv("METRICS_PROMETHEUS_PORT")
+    if statsd_address:
+        host, _, port = statsd_address.partition(":")
+        metrics.set_sink(metrics.StatsdSink(host, int(port or 8125)))
+    elif prometheus_port:
+        sink = metrics.PrometheusSink()
+        sink.serve(int(prometheus_port))
+        metrics.set_sink(sink)
 
 def main():
+    setup_metrics()
     st.title("🎯 AI Quiz Generator")
     st.markdown("Generate multiple-choice and true/false questions from your documents using AI")
     
@@ -39,6 +107,10 @@ def main():
         num_mcq = st.slider("Multiple Choice Questions", 1, 50, 5)
         num_tf = st.slider("True/False Questions", 1, 50, 5)
         difficulty = st.selectbox("Difficulty Level", ["Easy", "Medium", "Hard"])
+        regenerate = st.checkbox("Always generate fresh questions", value=False, help="Skip previously generated quizzes for the same document and settings")
+        show_debug = st.checkbox("Show debug metrics", value=False, help="Stage timings, token counts, retries and cache hits")
+        
+        render_history(get_quiz_store())
     
     # Main content area
     tab1, tab2, tab3 = st.tabs(["📄 Upload Document", "📝 Generate Quiz", "📋 Review & Export"])
@@ -53,28 +125,31 @@ def main():
         )
         
         if uploaded_file is not None:
-            # Save uploaded file temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                tmp_file_path = tmp_file.name
-            
             try:
                 with st.spinner("Processing document..."):
-                    processor = DocumentProcessor()
-                    text_content = processor.process_file(tmp_file_path, uploaded_file.type)
-                    st.session_state.processed_text = text_content
+                    # The processor caches by content hash, so reruns with the same file skip parsing.
+                    # getbuffer() is a zero-copy view of the upload; nothing is written to disk.
+                    processor = get_document_processor()
+                    with metrics.collect() as extraction_stats, metrics.stage("upload"):
+                        text_content = processor.process_upload(uploaded_file.getbuffer(), uploaded_file.type, uploaded_file.name)
+                    # Only a new upload replaces the current document, so a quiz reopened from history stays open
+                    if uploaded_file.file_id != st.session_state.upload_id:
+                        st.session_state.upload_id = uploaded_file.file_id
+                        st.session_state.processed_text = text_content
+                        st.session_state.document_hash = get_quiz_store().save_document(text_content, uploaded_file.name)
                 
                 st.success("✅ Document processed successfully!")
                 
+                if show_debug:
+                    with st.expander("🔧 Extraction Metrics"):
+                        st.json(extraction_stats.as_dict())
+                
                 # Show preview of extracted text
                 with st.expander("📖 Preview Extracted Text"):
                     st.text_area("Extracted Content", text_content[:2000] + "..." if len(text_content) > 2000 else text_content, height=200, disabled=True)
                 
             except Exception as e:
                 st.error(f"❌ Error processing document: {str(e)}")
-            finally:
-                # Clean up temporary file
-                os.unlink(tmp_file_path)
     
     with tab2:
         st.header("Generate Quiz Questions")
@@ -83,18 +158,70 @@ def main():
             st.info("Please upload and process a document first.")
             return
         
+        # Changing only the question counts tops up (or trims) the current quiz instead of starting over
+        current_quiz = st.session_state.quiz_data
+        existing_quiz = None
+        if (
+            not regenerate
+            and current_quiz is not None
+            and st.session_state.document_hash is not None
+            and st.session_state.quiz_document == st.session_state.document_hash
+            and current_quiz['metadata'].get('difficulty') == difficulty
+        ):
+            existing_quiz = current_quiz
+            new_mcq = max(0, num_mcq - len(current_quiz['multiple_choice']))
+            new_tf = max(0, num_tf - len(current_quiz['true_false']))
+            if new_mcq or new_tf:
+                st.caption(f"The current quiz is kept; {new_mcq} multiple choice and {new_tf} true/false questions will be added.")
+            elif num_mcq < len(current_quiz['multiple_choice']) or num_tf < len(current_quiz['true_false']):
+                st.caption("The current quiz will be trimmed to the new question counts.")
+        
         if st.button("🚀 Generate Quiz", type="primary", use_container_width=True):
             
             try:
-                with st.spinner("Generating questions using AI... This may take a moment."):
-                    generator = QuizGenerator(api_key)
-                    quiz_data = generator.generate_quiz(
-                        st.session_state.processed_text,
-                        num_mcq=num_mcq,
-                        num_tf=num_tf,
-                        difficulty=difficulty
-                    )
-                    st.session_state.quiz_data = quiz_data
+                generator = QuizGenerator(
+                    api_key,
+                    cache=get_quiz_cache(),
+                    scheduler=get_request_scheduler(),
+                    circuit_breaker=get_circuit_breaker(),
+                    session_id=st.session_state.session_id
+                )
+                stream = generator.stream_quiz(
+                    st.session_state.processed_text,
+                    num_mcq=num_mcq,
+                    num_tf=num_tf,
+                    difficulty=difficulty,
+                    use_cache=not regenerate,
+                    existing_quiz=existing_quiz
+                )
+                
+                # Show questions in both tabs as they arrive instead of waiting for the whole quiz
+                total = num_mcq + num_tf
+                progress = st.progress(0.0, text="Generating questions using AI...")
+                live_sections = {}
+                for tab in (tab2, tab3):
+                    with tab:
+                        live_sections[tab] = {
+                            "multiple_choice": st.container(),
+                            "true_false": st.container(),
+                        }
+                
+                received = {"multiple_choice": 0, "true_false": 0}
+                for question_type, question in stream:
+                    received[question_type] += 1
+                    for sections in live_sections.values():
+                        with sections[question_type]:
+                            render_question(question_type, received[question_type], question)
+                    done = sum(received.values())
+                    progress.progress(min(done / total, 1.0), text=f"Generated {done} of {total} questions...")
+                
+                quiz_data = stream.quiz
+                set_quiz(quiz_data, st.session_state.document_hash)
+                
+                try:
+                    get_quiz_store().save_quiz(st.session_state.document_hash, quiz_data)
+                except sqlite3.Error as e:
+                    st.warning(f"⚠️ Quiz could not be saved to history: {str(e)}")
                 
                 st.success(f"✅ Generated {len(quiz_data['multiple_choice'])} multiple choice and {len(quiz_data['true_false'])} true/false questions!")
                 st.rerun()
@@ -110,77 +237,33 @@ def main():
             return
         
         quiz_data = st.session_state.quiz_data
+        quiz_version = st.session_state.quiz_version
         
-        # Multiple Choice Questions Section
-        st.subheader("🔤 Multiple Choice Questions")
-        
-        for i, mcq in enumerate(quiz_data['multiple_choice']):
-            with st.container():
-                st.markdown(f"**Question {i+1}:** {mcq['question']}")
-                
-                # Display options
-                for j, option in enumerate(mcq['options']):
-                    prefix = chr(65 + j)  # A, B, C, D
-                    if option == mcq['correct_answer']:
-                        st.markdown(f"✅ **{prefix}.** {option}")
-                    else:
-                        st.markdown(f"{prefix}. {option}")
-                
-                st.markdown(f"**Explanation:** {mcq.get('explanation', 'No explanation provided')}")
-                st.divider()
+        shortfall = quiz_data.get('metadata', {}).get('shortfall')
+        if shortfall:
+            missing = ", ".join(f"{count} {question_type.replace('_', ' ')}" for question_type, count in shortfall.items())
+            st.warning(f"⚠️ Some requests failed, so this quiz is missing {missing} question(s). Generate again to retry.")
         
-        # True/False Questions Section
-        st.subheader("✅❌ True/False Questions")
+        if show_debug and quiz_data.get('metadata', {}).get('stats'):
+            with st.expander("🔧 Generation Metrics"):
+                st.json(quiz_data['metadata']['stats'])
         
-        for i, tf in enumerate(quiz_data['true_false']):
-            with st.container():
-                st.markdown(f"**Question {i+1}:** {tf['question']}")
-                
-                if tf['correct_answer']:
-                    st.markdown("✅ **Answer: True**")
-                else:
-                    st.markdown("❌ **Answer: False**")
-                
-                st.markdown(f"**Explanation:** {tf.get('explanation', 'No explanation provided')}")
-                st.divider()
+        render_review(quiz_data, quiz_version)
         
         # Export functionality
         st.subheader("📥 Export & Print Options")
         
         col1, col2, col3, col4 = st.columns(4)
         
+        # Exports are built only when asked for, then served from cache for this quiz version
         with col1:
-            # Export as JSON
-            quiz_json = json.dumps(quiz_data, indent=2)
-            st.download_button(
-                label="📄 Download JSON",
-                data=quiz_json,
-                file_name="quiz.json",
-                mime="application/json",
-                use_container_width=True
-            )
+            export_button("📄", "JSON", "json", "quiz.json", "application/json", quiz_data, quiz_version)
         
         with col2:
-            # Export as CSV
-            csv_data = create_csv_export(quiz_data)
-            st.download_button(
-                label="📊 Download CSV",
-                data=csv_data,
-                file_name="quiz.csv",
-                mime="text/csv",
-                use_container_width=True
-            )
+            export_button("📊", "CSV", "csv", "quiz.csv", "text/csv", quiz_data, quiz_version)
         
         with col3:
-            # Export as formatted text
-            text_data = create_text_export(quiz_data)
-            st.download_button(
-                label="📝 Download Text",
-                data=text_data,
-                file_name="quiz.txt",
-                mime="text/plain",
-                use_container_width=True
-            )
+            export_button("📝", "Text", "txt", "quiz.txt", "text/plain", quiz_data, quiz_version)
         
         with col4:
             # Print button
@@ -189,200 +272,148 @@ def main():
                 print_data = create_print_version(quiz_data)
                 components.html(print_data, height=0)
 
-def create_csv_export(quiz_data):
-    """Create CSV export of quiz data"""
-    rows = []
+def render_history(store):
+    """Sidebar list of stored quizzes; opening one restores the quiz and its document without generating"""
+    st.subheader("📚 Quiz History")
     
-    # Multiple choice questions
-    for i, mcq in enumerate(quiz_data['multiple_choice']):
-        rows.append({
-            'Question_Number': f"MC{i+1}",
-            'Type': 'Multiple Choice',
-            'Question': mcq['question'],
-            'Option_A': mcq['options'][0] if len(mcq['options']) > 0 else '',
-            'Option_B': mcq['options'][1] if len(mcq['options']) > 1 else '',
-            'Option_C': mcq['options'][2] if len(mcq['options']) > 2 else '',
-            'Option_D': mcq['options'][3] if len(mcq['options']) > 3 else '',
-            'Correct_Answer': mcq['correct_answer'],
-            'Explanation': mcq.get('explanation', '')
-        })
+    difficulty = st.selectbox("Difficulty", ["All", "Easy", "Medium", "Hard"], key="history_difficulty")
+    period = st.selectbox("Created", ["Any time", "Last 24 hours", "Last 7 days", "Last 30 days"], key="history_period")
+    this_document = st.checkbox(
+        "Only the current document", value=False, key="history_document",
+        disabled=st.session_state.document_hash is None
+    )
     
-    # True/False questions
-    for i, tf in enumerate(quiz_data['true_false']):
-        rows.append({
-            'Question_Number': f"TF{i+1}",
-            'Type': 'True/False',
-            'Question': tf['question'],
-            'Option_A': 'True',
-            'Option_B': 'False',
-            'Option_C': '',
-            'Option_D': '',
-            'Correct_Answer': 'True' if tf['correct_answer'] else 'False',
-            'Explanation': tf.get('explanation', '')
-        })
+    days = {"Last 24 hours": 1, "Last 7 days": 7, "Last 30 days": 30}.get(period)
+    quizzes = store.list_quizzes(
+        document_hash=st.session_state.document_hash if this_document else None,
+        difficulty=None if difficulty == "All" else difficulty,
+        since=time.time() - days * 86400 if days else None,
+        limit=25
+    )
+    if not quizzes:
+        st.caption("No saved quizzes yet.")
+        return
     
-    df = pd.DataFrame(rows)
-    return df.to_csv(index=False)
+    summaries = {quiz["id"]: quiz for quiz in quizzes}
+    quiz_id = st.selectbox(
+        "Saved quizzes", list(summaries), key="history_quiz",
+        format_func=lambda quiz_id: (
+            f"{summaries[quiz_id]['document_name']} · {summaries[quiz_id]['difficulty']} · "
+            f"{summaries[quiz_id]['num_mcq']} MC + {summaries[quiz_id]['num_tf']} T/F · "
+            f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(summaries[quiz_id]['created_at']))}"
+        )
+    )
+    if st.button("📂 Open Quiz", use_container_width=True):
+        quiz_data, document_hash = store.get_quiz(quiz_id)
+        document = store.get_document(document_hash)
+        st.session_state.processed_text = document["text"]
+        st.session_state.document_hash = document_hash
+        set_quiz(quiz_data, document_hash)
+        st.rerun()
 
-def create_text_export(quiz_data):
-    """Create formatted text export of quiz data"""
-    output = []
-    output.append("AI GENERATED QUIZ")
-    output.append("=" * 50)
-    output.append("")
+def export_button(icon, label, export_format, file_name, mime, quiz_data, quiz_version):
+    """Show a Prepare button for an export, then its download button once prepared"""
+    prepared_key = f"prepared_{export_format}"
+    if st.session_state.get(prepared_key) != quiz_version:
+        st.button(
+            f"{icon} Prepare {label}",
+            key=f"prepare_{export_format}",
+            on_click=lambda: st.session_state.update({prepared_key: quiz_version}),
+            use_container_width=True
+        )
+        return
     
-    # Multiple Choice Questions
-    output.append("MULTIPLE CHOICE QUESTIONS")
-    output.append("-" * 30)
-    output.append("")
+    st.download_button(
+        label=f"{icon} Download {label}",
+        data=build_export(quiz_version, export_format, quiz_data),
+        file_name=file_name,
+        mime=mime,
+        use_container_width=True
+    )
+
+REVIEW_SECTIONS = {
+    "multiple_choice": "🔤 Multiple Choice Questions",
+    "true_false": "✅❌ True/False Questions",
+}
+
+def get_review_index(quiz_data, quiz_version):
+    """(question_type, number, question, search text) for every question, built once per quiz version"""
+    cached = st.session_state.get('review_index')
+    if cached is not None and cached[0] == quiz_version:
+        return cached[1]
     
-    for i, mcq in enumerate(quiz_data['multiple_choice']):
-        output.append(f"Question {i+1}: {mcq['question']}")
-        output.append("")
-        for j, option in enumerate(mcq['options']):
-            prefix = chr(65 + j)  # A, B, C, D
-            marker = " [CORRECT]" if option == mcq['correct_answer'] else ""
-            output.append(f"{prefix}. {option}{marker}")
-        output.append("")
-        output.append(f"Explanation: {mcq.get('explanation', 'No explanation provided')}")
-        output.append("")
-        output.append("-" * 30)
-        output.append("")
+    index = []
+    for question_type in REVIEW_SECTIONS:
+        for i, question in enumerate(quiz_data.get(question_type, [])):
+            search_text = " ".join([question['question'], *map(str, question.get('options', [])), question.get('explanation', '')]).lower()
+            index.append((question_type, i + 1, question, search_text))
+    st.session_state.review_index = (quiz_version, index)
+    return index
+
+def render_review(quiz_data, quiz_version):
+    """Render one page of questions, with search and a filter by type"""
+    index = get_review_index(quiz_data, quiz_version)
     
-    # True/False Questions
-    output.append("TRUE/FALSE QUESTIONS")
-    output.append("-" * 20)
-    output.append("")
+    col1, col2, col3 = st.columns([3, 2, 1])
+    with col1:
+        query = st.text_input("🔍 Search questions", key="review_query").strip().lower()
+    with col2:
+        type_filter = st.selectbox(
+            "Question type", ["All", *REVIEW_SECTIONS],
+            format_func=lambda key: key if key == "All" else REVIEW_SECTIONS[key].split(" ", 1)[1],
+            key="review_type"
+        )
+    with col3:
+        page_size = st.selectbox("Per page", [10, 25, 50], key="review_page_size")
+    
+    matches = index
+    if type_filter != "All" or query:
+        matches = [
+            entry for entry in index
+            if (type_filter == "All" or entry[0] == type_filter) and query in entry[3]
+        ]
+    if not matches:
+        st.info("No questions match your search.")
+        return
     
-    for i, tf in enumerate(quiz_data['true_false']):
-        output.append(f"Question {i+1}: {tf['question']}")
-        output.append("")
-        correct_answer = "True" if tf['correct_answer'] else "False"
-        output.append(f"Answer: {correct_answer}")
-        output.append("")
-        output.append(f"Explanation: {tf.get('explanation', 'No explanation provided')}")
-        output.append("")
-        output.append("-" * 20)
-        output.append("")
+    num_pages = (len(matches) - 1) // page_size + 1
+    page = 1
+    if num_pages > 1:
+        page = st.number_input(f"Page (of {num_pages})", min_value=1, max_value=num_pages, value=1, step=1)
+    start = (page - 1) * page_size
+    st.caption(f"Showing {start + 1}-{min(start + page_size, len(matches))} of {len(matches)} questions")
     
-    return "\n".join(output)
+    # Only the visible page is rendered, one markdown element per question
+    section = None
+    for question_type, number, question, _ in matches[start:start + page_size]:
+        if question_type != section:
+            section = question_type
+            st.subheader(REVIEW_SECTIONS[question_type])
+        render_question(question_type, number, question)
 
-def create_print_version(quiz_data):
-    """Create HTML for print-friendly version"""
-    html_content = f"""
-    <script>
-    const printWindow = window.open('', '_blank');
-    printWindow.document.write(`
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Quiz - Print Version</title>
-        <style>
-            body {{ 
-                font-family: Arial, sans-serif; 
-                margin: 20px; 
-                line-height: 1.6;
-                color: #333;
-            }}
-            .header {{
-                text-align: center;
-                border-bottom: 3px solid #dc2626;
-                padding-bottom: 20px;
-                margin-bottom: 30px;
-            }}
-            .question-section {{
-                margin-bottom: 40px;
-            }}
-            .question {{
-                background: #f9f9f9;
-                padding: 15px;
-                border-left: 4px solid #dc2626;
-                margin-bottom: 20px;
-                border-radius: 5px;
-            }}
-            .question-title {{
-                font-weight: bold;
-                margin-bottom: 10px;
-                color: #dc2626;
-            }}
-            .options {{
-                margin: 10px 0;
-            }}
-            .correct {{
-                background: #dcfce7;
-                font-weight: bold;
-                color: #15803d;
-            }}
-            .explanation {{
-                background: #eff6ff;
-                padding: 10px;
-                margin-top: 10px;
-                border-radius: 3px;
-                font-style: italic;
-            }}
-            @media print {{
-                .no-print {{ display: none; }}
-                body {{ margin: 0; }}
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="header">
-            <h1>🎯 AI Generated Quiz</h1>
-            <p>Generated on {pd.Timestamp.now().strftime('%B %d, %Y at %I:%M %p')}</p>
-        </div>
-        
-        <div class="question-section">
-            <h2>📝 Multiple Choice Questions</h2>
-    """
+def question_markdown(question_type, number, question):
+    """Markdown block for one question with its answer and explanation"""
+    lines = [f"**Question {number}:** {question['question']}", ""]
     
-    # Add multiple choice questions
-    for i, mcq in enumerate(quiz_data['multiple_choice']):
-        html_content += f"""
-            <div class="question">
-                <div class="question-title">Question {i+1}: {mcq['question']}</div>
-                <div class="options">
-        """
-        for j, option in enumerate(mcq['options']):
+    if question_type == "multiple_choice":
+        # Display options
+        for j, option in enumerate(question['options']):
             prefix = chr(65 + j)  # A, B, C, D
-            correct_class = "correct" if option == mcq['correct_answer'] else ""
-            html_content += f'<div class="{correct_class}">{prefix}. {option}</div>'
-        
-        html_content += f"""
-                </div>
-                <div class="explanation"><strong>Explanation:</strong> {mcq.get('explanation', 'No explanation provided')}</div>
-            </div>
-        """
+            if option == question['correct_answer']:
+                lines.append(f"✅ **{prefix}.** {option}  ")
+            else:
+                lines.append(f"{prefix}. {option}  ")
+    elif question['correct_answer']:
+        lines.append("✅ **Answer: True**")
+    else:
+        lines.append("❌ **Answer: False**")
     
-    # Add true/false questions
-    html_content += """
-        </div>
-        
-        <div class="question-section">
-            <h2>✅ True/False Questions</h2>
-    """
-    
-    for i, tf in enumerate(quiz_data['true_false']):
-        correct_answer = "True" if tf['correct_answer'] else "False"
-        html_content += f"""
-            <div class="question">
-                <div class="question-title">Question {i+1}: {tf['question']}</div>
-                <div class="options correct">Answer: {correct_answer}</div>
-                <div class="explanation"><strong>Explanation:</strong> {tf.get('explanation', 'No explanation provided')}</div>
-            </div>
-        """
-    
-    html_content += """
-        </div>
-    </body>
-    </html>
-    `);
-    printWindow.document.close();
-    printWindow.print();
-    </script>
-    """
-    
-    return html_content
+    lines += ["", f"**Explanation:** {question.get('explanation', 'No explanation provided')}", "", "---"]
+    return "\n".join(lines)
+
+def render_question(question_type, number, question):
+    """Render one question with its answer and explanation"""
+    st.markdown(question_markdown(question_type, number, question))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,198 @@
+"""
+Generate quizzes for every document in a directory without the web UI.
+
+    python batch_generate.py course_pdfs/ --output-dir quizzes/ --mcq 10 --tf 10
+
+Text is extracted in a process pool and quizzes are generated concurrently under the
+shared request rate limit. Progress is recorded in a manifest in the output directory,
+so an interrupted run picks up where it stopped; documents whose content has not
+changed since their quiz was written are skipped.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from document_processor import DocumentProcessor
+from exporters import EXPORT_WRITERS, write_export
+from quiz_generator import QuizGenerator
+from rate_limiter import RequestScheduler
+
+# File extension -> MIME type understood by DocumentProcessor
+FILE_TYPES = {
+    ".pdf": "application/pdf",
+    ".txt": "text/plain",
+}
+
+MANIFEST_NAME = "manifest.json"
+
+
+def find_documents(input_dir):
+    """Relative paths of supported documents under input_dir, in a stable order"""
+    documents = []
+    for root, _, names in os.walk(input_dir):
+        for name in names:
+            if os.path.splitext(name)[1].lower() in FILE_TYPES:
+                documents.append(os.path.relpath(os.path.join(root, name), input_dir))
+    return sorted(documents)
+
+
+def file_digest(path):
+    """sha256 of a file's content, read in blocks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_text(path):
+    """Extract a document's text (runs in a worker process)"""
+    # The batch already runs one document per process; do not fan out again per PDF
+    processor = DocumentProcessor(pdf_workers=1, max_chars=None)
+    file_type = FILE_TYPES[os.path.splitext(path)[1].lower()]
+    processor.validate_file(path, max_size_mb=200)
+    return processor.process_file(path, file_type, os.path.basename(path))
+
+
+class Manifest:
+    """Checkpoint of finished documents, rewritten atomically after every change"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_done(self, document, digest, settings, outputs):
+        entry = self.entries.get(document)
+        return (
+            entry is not None
+            and entry.get("status") == "done"
+            and entry.get("sha256") == digest
+            and entry.get("settings") == settings
+            and entry.get("outputs") == outputs
+            and all(os.path.exists(path) for path in outputs)
+        )
+
+    def record(self, document, **entry):
+        with self._lock:
+            self.entries[document] = entry
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self.entries, file, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def output_paths(output_dir, document, formats):
+    """
+    Output files of a document, one per format
+
+    The source extension is kept (notes.pdf.json), so notes.pdf and notes.txt in the
+    same folder do not overwrite each other's quizzes.
+    """
+    return [os.path.join(output_dir, f"{document}.{output_format}") for output_format in formats]
+
+
+def write_outputs(quiz_data, paths, formats):
+    """Write the quiz in each requested format to the matching path"""
+    for path, output_format in zip(paths, formats):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            write_export(quiz_data, output_format, file)
+    return paths
+
+
+def run(args):
+    api_key = args.api_key or os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise SystemExit("Gemini API key not found: pass --api-key or set GEMINI_API_KEY")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest = Manifest(os.path.join(args.output_dir, MANIFEST_NAME))
+    settings = {"mcq": args.mcq, "tf": args.tf, "difficulty": args.difficulty}
+
+    pending = []
+    for document in find_documents(args.input_dir):
+        digest = file_digest(os.path.join(args.input_dir, document))
+        if manifest.is_done(document, digest, settings, output_paths(args.output_dir, document, args.formats)):
+            print(f"skip  {document}")
+        else:
+            pending.append((document, digest))
+    if not pending:
+        print("Nothing to do")
+        return 0
+
+    scheduler = RequestScheduler(requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+    generator = QuizGenerator(api_key, scheduler=scheduler, session_id="batch")
+    failures = 0
+
+    def generate(document, digest, text_content):
+        quiz_data = generator.generate_quiz(text_content, args.mcq, args.tf, args.difficulty)
+        outputs = write_outputs(quiz_data, output_paths(args.output_dir, document, args.formats), args.formats)
+        shortfall = quiz_data["metadata"].get("shortfall")
+        # Partial quizzes stay unfinished so the next run tries them again
+        manifest.record(
+            document, status="partial" if shortfall else "done", sha256=digest,
+            settings=settings, outputs=outputs, shortfall=shortfall
+        )
+        return shortfall
+
+    with ProcessPoolExecutor(max_workers=args.workers) as extractors, \
+            ThreadPoolExecutor(max_workers=args.concurrency) as generators:
+        extracting = {
+            extractors.submit(extract_text, os.path.join(args.input_dir, document)): (document, digest)
+            for document, digest in pending
+        }
+        generating = {}
+        # Start generating each document as soon as its text is ready
+        while extracting or generating:
+            done, _ = wait(list(extracting) + list(generating), return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in extracting:
+                    document, digest = extracting.pop(future)
+                    try:
+                        text_content = future.result()
+                    except Exception as e:
+                        failures += 1
+                        manifest.record(document, status="failed", sha256=digest, settings=settings, error=str(e))
+                        print(f"fail  {document}: {e}")
+                        continue
+                    generating[generators.submit(generate, document, digest, text_content)] = (document, digest)
+                else:
+                    document, digest = generating.pop(future)
+                    try:
+                        shortfall = future.result()
+                    except Exception as e:
+                        failures += 1
+                        manifest.record(document, status="failed", sha256=digest, settings=settings, error=str(e))
+                        print(f"fail  {document}: {e}")
+                        continue
+                    print(f"{'part' if shortfall else 'done'}  {document}")
+
+    return 1 if failures else 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate quizzes for every PDF and text file in a directory")
+    parser.add_argument("input_dir", help="Directory to search for documents (recursively)")
+    parser.add_argument("--output-dir", default="quizzes", help="Where quizzes and the manifest are written")
+    parser.add_argument("--mcq", type=int, default=5, help="Multiple choice questions per document")
+    parser.add_argument("--tf", type=int, default=5, help="True/false questions per document")
+    parser.add_argument("--difficulty", choices=["Easy", "Medium", "Hard"], default="Medium")
+    parser.add_argument("--formats", nargs="+", choices=sorted(EXPORT_WRITERS), default=["json", "csv"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Extraction processes")
+    parser.add_argument("--concurrency", type=int, default=4, help="Documents generated at the same time")
+    parser.add_argument("--rpm", type=int, default=int(os.getenv("GEMINI_RPM", "15")), help="Requests per minute quota")
+    parser.add_argument("--tpm", type=int, default=int(os.getenv("GEMINI_TPM", "1000000")), help="Tokens per minute quota")
+    parser.add_argument("--api-key", help="Gemini API key (defaults to GEMINI_API_KEY)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    sys.exit(run(parse_args()))
@@ -0,0 +1,54 @@
+"""
+Benchmark DocumentProcessor._clean_text on multi-megabyte inputs
+
+Compares the current normalization pipeline with the original implementation
+(whitespace collapse plus the repeated newline-replace loop).
+
+Usage:
+    python benchmarks/bench_clean_text.py [--sizes-mb 1 4 16] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from document_processor import DocumentProcessor
+from synthetic import make_text
+
+
+def legacy_clean_text(text):
+    """The pre-pipeline implementation, kept here as the comparison baseline"""
+    text = " ".join(text.split())
+    while "\n\n\n" in text:
+        text = text.replace("\n\n\n", "\n\n")
+    return text.strip()
+
+
+def best_of(func, text, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    processor = DocumentProcessor(max_chars=None)
+    print(f"{'size_mb':>8} {'legacy_s':>10} {'current_s':>10} {'MB/s':>8}")
+    for size_mb in args.sizes_mb:
+        text = make_text(int(size_mb * 1024 * 1024))
+        legacy = best_of(legacy_clean_text, text, args.repeat)
+        current = best_of(processor._clean_text, text, args.repeat)
+        print(f"{size_mb:>8.1f} {legacy:>10.4f} {current:>10.4f} {size_mb / current:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
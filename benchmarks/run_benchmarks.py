@@ -0,0 +1,210 @@
+"""
+Benchmark suite for the extraction, parsing, generation and export hot paths
+
+Each case reports its best wall time over --repeat runs and the peak Python heap
+allocation (tracemalloc) of one extra run, and the whole run is written as JSON so
+results can be compared between releases. Generation runs against the local
+StubBackend, so no API key or network access is needed.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--quick] [--only pdf clean] [--output results.json]
+    python benchmarks/run_benchmarks.py --compare baseline.json
+
+PDF extraction above DocumentProcessor.parallel_min_pages runs in worker processes,
+whose memory is not included in the peak figure.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from document_processor import DocumentProcessor
+from exporters import EXPORT_WRITERS, create_csv_export, create_print_version, create_text_export, write_export
+from model_backends import StubBackend
+from quiz_generator import QuizGenerator
+from response_parser import IncrementalQuestionParser, decode_response
+from synthetic import make_pages, make_pdf, make_quiz, make_response, make_text
+
+# Parameter grid per case: (full run, --quick run)
+SIZES = {
+    "pdf_pages": ([1, 10, 100, 1000], [1, 10, 100]),
+    "clean_text_mb": ([1, 4, 16], [1]),
+    "response_questions": ([10, 100, 1000], [10, 100]),
+    "quiz_questions": ([10, 50, 200], [10, 50]),
+    "export_questions": ([10, 100, 1000, 10000], [10, 100, 1000]),
+}
+
+
+def measure(func, repeat):
+    """Best wall time of repeat calls and peak traced allocation of one more call"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+def legacy_parse_response(response_text):
+    """The pre-decoder JSON path (slice, whitespace cleanup, json.loads), kept as the comparison baseline"""
+    json_text = response_text[response_text.find('{'):response_text.rfind('}') + 1]
+    json_text = json_text.replace('\n', ' ').replace('\t', ' ')
+    json_text = re.sub(r'\s+', ' ', json_text)
+    try:
+        return json.loads(json_text).get("questions", [])
+    except json.JSONDecodeError:
+        return None
+
+
+def stream_to_devnull(quiz, export_format):
+    with open(os.devnull, "w", encoding="utf-8", newline="") as file:
+        write_export(quiz, export_format, file)
+
+
+def pdf_cases(sizes):
+    processor = DocumentProcessor(max_chars=None)
+    for pages in sizes["pdf_pages"]:
+        data = make_pdf(make_pages(pages))
+        yield "pdf_extract", {"pages": pages, "bytes": len(data)}, lambda data=data: processor._process_pdf(data)
+
+
+def clean_cases(sizes):
+    processor = DocumentProcessor(max_chars=None)
+    for size_mb in sizes["clean_text_mb"]:
+        text = make_text(int(size_mb * 1024 * 1024))
+        yield "clean_text", {"mb": size_mb}, lambda text=text: processor._clean_text(text)
+
+
+def parse_cases(sizes):
+    generator = QuizGenerator(None, backend=StubBackend())
+    for num in sizes["response_questions"]:
+        valid = make_response(num)
+        malformed = make_response(num, malformed=True)
+
+        def incremental(text=valid):
+            parser = IncrementalQuestionParser()
+            for start in range(0, len(text), 64):
+                parser.feed(text[start:start + 64])
+
+        params = {"questions": num, "chars": len(valid)}
+        yield "parse_legacy", params, lambda text=valid: legacy_parse_response(text)
+        yield "parse_decoder", params, lambda text=valid: decode_response(text, "multiple_choice")
+        yield "parse_json", params, lambda text=valid: generator._parse_response_text(text, "multiple_choice")
+        yield "parse_incremental", params, incremental
+        yield "parse_malformed", dict(params, chars=len(malformed)), \
+            lambda text=malformed: generator._parse_response_text(text, "multiple_choice")
+        yield "extract_manually", dict(params, chars=len(malformed)), \
+            lambda text=malformed: generator._extract_questions_manually(text, "mcq")
+
+
+def generate_cases(sizes):
+    text = "\n\n".join(make_pages(50))
+    for num in sizes["quiz_questions"]:
+        def run(num=num):
+            generator = QuizGenerator(None, backend=StubBackend(latency=0.05, chunk_chars=256))
+            generator.generate_quiz(text, num_mcq=num // 2, num_tf=num - num // 2, use_cache=False)
+        yield "generate_quiz", {"questions": num, "stub_latency_s": 0.05}, run
+
+
+def export_cases(sizes):
+    for num in sizes["export_questions"]:
+        quiz = make_quiz(num)
+        yield "export_csv", {"questions": num}, lambda quiz=quiz: create_csv_export(quiz)
+        yield "export_text", {"questions": num}, lambda quiz=quiz: create_text_export(quiz)
+        yield "export_print", {"questions": num}, lambda quiz=quiz: create_print_version(quiz)
+        for export_format in EXPORT_WRITERS:
+            yield f"stream_{export_format}", {"questions": num}, \
+                lambda quiz=quiz, export_format=export_format: stream_to_devnull(quiz, export_format)
+
+
+GROUPS = {
+    "pdf": pdf_cases,
+    "clean": clean_cases,
+    "parse": parse_cases,
+    "generate": generate_cases,
+    "export": export_cases,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def result_key(result):
+    return result["name"], json.dumps(result["params"], sort_keys=True)
+
+
+def compare(results, baseline_path):
+    """Print each case's time and peak memory relative to a previous results file"""
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = {result_key(result): result for result in json.load(file)["results"]}
+    print(f"\n{'case':<44} {'time x':>8} {'peak x':>8}")
+    for result in results:
+        previous = baseline.get(result_key(result))
+        if previous is None:
+            continue
+        time_ratio = result["seconds"] / max(previous["seconds"], 1e-9)
+        peak_ratio = result["peak_bytes"] / max(previous["peak_bytes"], 1)
+        label = f"{result['name']} {json.dumps(result['params'], sort_keys=True)}"
+        print(f"{label[:44]:<44} {time_ratio:>8.2f} {peak_ratio:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=sorted(GROUPS), help="Run only these groups")
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs for a fast smoke run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Results JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    sizes = {name: grid[1] if args.quick else grid[0] for name, grid in SIZES.items()}
+    results = []
+    print(f"{'case':<20} {'params':<40} {'seconds':>10} {'peak_MB':>10}")
+    for group in args.only or GROUPS:
+        for name, params, func in GROUPS[group](sizes):
+            seconds, peak = measure(func, args.repeat)
+            results.append({"name": name, "params": params, "seconds": seconds, "peak_bytes": peak})
+            print(f"{name:<20} {json.dumps(params, sort_keys=True):<40} {seconds:>10.4f} {peak / 2 ** 20:>10.2f}")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "quick": args.quick,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Deterministic synthetic inputs shared by the benchmarks"""
+import json
+import random
+
+_WORDS = (
+    "cell membrane protein energy enzyme glucose oxygen carbon nucleus gene chromosome "
+    "photosynthesis respiration mitochondria chlorophyll diffusion osmosis tissue organ "
+    "evolution species population ecosystem nutrient molecule reaction catalyst structure"
+).split()
+
+
+def make_text(size_bytes):
+    """Synthetic extracted-PDF text: wrapped lines, hyphenation and blank-line paragraphs"""
+    line = "The mitochondria is the power-\nhouse of the cell and  drives   metabolism\n"
+    paragraph = line * 6 + "\n\n"
+    return (paragraph * (size_bytes // len(paragraph) + 1))[:size_bytes]
+
+
+def make_pages(num_pages, lines_per_page=40, words_per_line=12, seed=0):
+    """Page texts with varied wording so header/footer detection keeps the body"""
+    rng = random.Random(seed)
+    return [
+        "\n".join(" ".join(rng.choice(_WORDS) for _ in range(words_per_line)) for _ in range(lines_per_page))
+        for _ in range(num_pages)
+    ]
+
+
+def make_pdf(pages):
+    """Minimal valid PDF with one Helvetica text block per page"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages))), len(pages))).encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        operations = ["BT /F1 10 Tf 14 TL 50 750 Td"]
+        for line in text.split("\n"):
+            escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            operations.append(f"({escaped}) Tj T*")
+        operations.append("ET")
+        stream = "\n".join(operations).encode("latin-1", "replace")
+        objects.append((
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        ).encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
+
+
+def make_quiz(num_questions, seed=0):
+    """Quiz data with num_questions questions split evenly between the two types"""
+    rng = random.Random(seed)
+    num_mcq = num_questions // 2
+    quiz = {"multiple_choice": [], "true_false": []}
+    for i in range(num_mcq):
+        options = [" ".join(rng.choice(_WORDS) for _ in range(4)) for _ in range(4)]
+        quiz["multiple_choice"].append({
+            "question": f"Question {i}: what links {rng.choice(_WORDS)} and {rng.choice(_WORDS)}?",
+            "options": options,
+            "correct_answer": rng.choice(options),
+            "explanation": " ".join(rng.choice(_WORDS) for _ in range(20)),
+        })
+    for i in range(num_questions - num_mcq):
+        quiz["true_false"].append({
+            "question": f"Statement {i}: {rng.choice(_WORDS)} requires {rng.choice(_WORDS)}.",
+            "correct_answer": rng.random() < 0.5,
+            "explanation": " ".join(rng.choice(_WORDS) for _ in range(20)),
+        })
+    quiz["metadata"] = {"difficulty": "Medium", "total_questions": num_questions, "source_length": 0}
+    return quiz
+
+
+def make_response(num_questions, question_type="multiple_choice", malformed=False, seed=0):
+    """
+    Model response text for num_questions questions
+
+    The valid form is fenced JSON with prose around it, as models often return. The
+    malformed form uses single quotes and trailing commas, which json.loads rejects.
+    """
+    quiz = make_quiz(num_questions * 2, seed)
+    body = json.dumps({"questions": quiz[question_type][:num_questions]}, indent=2)
+    if malformed:
+        body = body.replace('"', "'").replace("}", "},", num_questions)
+    return f"Here are the questions you asked for:\n```json\n{body}\n```\nLet me know if you need more."
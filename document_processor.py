@@ -1,127 +1,589 @@
+import io
 import os
-import tempfile
-from typing import Union
+import re
+import mmap
+import multiprocessing
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, List, Optional, Union
 import PyPDF2
+from prompt_budget import CHARS_PER_TOKEN
+import metrics
+
+# Separator that iter_text pieces are meant to be joined with; pages and
+# paragraphs both end up as blank-line separated blocks
+PIECE_SEPARATOR = "\n\n"
+
+# Part of the extraction cache key; bump it when normalization changes so cached text is not reused
+NORMALIZATION_VERSION = 1
+
+# Precompiled text normalization patterns. Every pattern starts with a literal
+# character so matching stays linear even on multi-megabyte inputs.
+_PARAGRAPH_BREAK = re.compile(r'\n[^\S\n]*\n')
+_HYPHENATED_BREAK = re.compile(r'-(?<=\w-)[^\S\n]*\n[^\S\n]*(?=[a-z])')
+_DIGITS = re.compile(r'\d+')
+
+# A document can be a path on disk or its content already in memory
+Source = Union[str, bytes, bytearray, memoryview, BinaryIO]
+
+
+class _MemoryReader(io.RawIOBase):
+    """Read-only raw stream over a buffer (memoryview, bytearray, mmap) without copying it"""
+    
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast('B')
+        self._pos = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def readinto(self, b) -> int:
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+@contextmanager
+def _open_binary(source: Source, mmap_min_bytes: Optional[int] = None) -> Iterator[BinaryIO]:
+    """
+    Open any Source as a seekable binary stream without writing it to disk
+    
+    Paths at least mmap_min_bytes long are memory-mapped instead of read through
+    buffered file I/O. Caller-owned streams are rewound but not closed.
+    """
+    if isinstance(source, str):
+        if mmap_min_bytes is not None and os.path.getsize(source) >= mmap_min_bytes:
+            with open(source, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                stream = io.BufferedReader(_MemoryReader(mapped))
+                try:
+                    yield stream
+                finally:
+                    # The view into the mapping must be released before the mapping closes
+                    stream.close()
+        else:
+            with open(source, 'rb') as file:
+                yield file
+    elif isinstance(source, bytes):
+        # BytesIO shares an immutable bytes object instead of copying it
+        yield io.BytesIO(source)
+    elif isinstance(source, (bytearray, memoryview)):
+        with io.BufferedReader(_MemoryReader(source)) as stream:
+            yield stream
+    else:
+        source.seek(0)
+        yield source
+
+
+# PDF reader of a ProcessPoolExecutor worker, opened once by _init_pdf_worker
+_worker_reader: Optional[PyPDF2.PdfReader] = None
+
+
+def _init_pdf_worker(source: Union[str, bytes]) -> None:
+    """
+    Open the PDF once per worker process
+    
+    The content (or path) travels to each worker once as an initializer argument, and
+    the cross-reference table is parsed once, instead of once per page range.
+    """
+    global _worker_reader
+    # Kept open for the worker's lifetime; the pool shuts the process down afterwards
+    file = open(source, 'rb') if isinstance(source, str) else io.BytesIO(source)
+    _worker_reader = PyPDF2.PdfReader(file)
+
+
+def _extract_page_range(start: int, end: int) -> List[str]:
+    """
+    Extract the non-empty text of pages [start, end) of the worker's PDF
+    
+    Module level so it can be pickled into ProcessPoolExecutor workers.
+    """
+    page_texts = []
+    for page_num in range(start, end):
+        page_text = _worker_reader.pages[page_num].extract_text()
+        if page_text.strip():
+            page_texts.append(page_text.strip())
+    return page_texts
+
 
 class DocumentProcessor:
     """Handle processing of PDF and text files using PyPDF2 and native text reading"""
     
-    def __init__(self):
-        pass
+    def __init__(self, cache_size: int = 32, cache_dir: Optional[str] = None,
+                 pdf_workers: Optional[int] = None, parallel_min_pages: int = 40,
+                 max_chars: Optional[int] = 8000, mmap_min_bytes: Optional[int] = 16 * 1024 * 1024,
+                 dehyphenate: bool = True, strip_headers: bool = True, header_sample_pages: int = 8):
+        """
+        Initialize the processor
+        
+        Args:
+            cache_size (int): Number of extracted documents kept in memory (0 disables the cache)
+            cache_dir (str): Optional directory for an on-disk extraction cache
+            pdf_workers (int): Worker processes for PDF extraction (defaults to the CPU count, 1 disables)
+            parallel_min_pages (int): PDFs with fewer pages are always extracted serially
+            max_chars (int): Character budget for extracted text; reading stops once it is met (None reads everything)
+            mmap_min_bytes (int): Files on disk at least this large are memory-mapped (None disables)
+            dehyphenate (bool): Re-join words hyphenated across line breaks
+            strip_headers (bool): Remove running headers/footers and page numbers repeated across PDF pages
+            header_sample_pages (int): Number of leading pages used to learn running headers/footers
+        """
+        self.cache_size = cache_size
+        self.cache_dir = cache_dir
+        self.pdf_workers = pdf_workers if pdf_workers is not None else (os.cpu_count() or 1)
+        self.parallel_min_pages = parallel_min_pages
+        self.max_chars = max_chars
+        self.mmap_min_bytes = mmap_min_bytes
+        self.dehyphenate = dehyphenate
+        self.strip_headers = strip_headers
+        self.header_sample_pages = header_sample_pages
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+    
+    def process_upload(self, data: Union[bytes, bytearray, memoryview], file_type: str, file_name: str = "") -> str:
+        """
+        Extract text from uploaded file bytes, reusing earlier results for identical content
+        
+        Args:
+            data (bytes): Raw file content (any buffer, e.g. a memoryview of the upload)
+            file_type (str): MIME type of the file
+            file_name (str): Original file name, used to pick the parser when the MIME type is missing
+        
+        Returns:
+            str: Extracted text content
+        """
+        suffix = os.path.splitext(file_name)[1].lower()
+        # Every option that changes the extracted text is part of the key
+        options = f"{self.max_chars}-{self.dehyphenate:d}-{self.strip_headers:d}-{self.header_sample_pages}"
+        key = f"{hashlib.sha256(data).hexdigest()}-{file_type}-{suffix}-{options}-v{NORMALIZATION_VERSION}"
+        
+        cached = self._cache_get(key)
+        if cached is not None:
+            metrics.count("extraction_cache_hits")
+            return cached
+        metrics.count("extraction_cache_misses")
+        
+        # Cache miss: parse straight from the in-memory buffer
+        text = self.process_file(data, file_type, file_name)
+        
+        self._cache_put(key, text)
+        return text
     
-    def process_file(self, file_path: str, file_type: str) -> str:
+    def _cache_get(self, key: str) -> Optional[str]:
+        """Look an extraction up in the memory cache, then on disk"""
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._cache_path(key), 'r', encoding='utf-8') as file:
+                text = file.read()
+        except OSError:
+            return None
+        
+        self._cache_put(key, text, write_disk=False)
+        return text
+    
+    def _cache_put(self, key: str, text: str, write_disk: bool = True) -> None:
+        """Store an extraction in the memory LRU and, if configured, on disk"""
+        if self.cache_size > 0:
+            with self._cache_lock:
+                self._cache[key] = text
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        
+        if write_disk and self.cache_dir:
+            path = self._cache_path(key)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as file:
+                    file.write(text)
+                os.replace(tmp_path, path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+    
+    def _cache_path(self, key: str) -> str:
+        # MIME types contain '/', keep file names flat
+        return os.path.join(self.cache_dir, key.replace('/', '_') + ".txt")
+    
+    def process_file(self, source: Source, file_type: str, file_name: str = "") -> str:
         """
         Process uploaded file and extract text content
         
         Args:
-            file_path (str): Path to the uploaded file
+            source (Source): Path to the uploaded file, or its content as bytes, a memoryview or a binary stream
             file_type (str): MIME type of the file
+            file_name (str): Original file name, used to pick the parser when the MIME type is missing
         
         Returns:
             str: Extracted text content
         """
         try:
-            if file_type == "application/pdf" or file_path.endswith('.pdf'):
-                return self._process_pdf(file_path)
-            elif file_type == "text/plain" or file_path.endswith('.txt'):
-                return self._process_text(file_path)
+            kind = self._detect_kind(source, file_type, file_name)
+            if kind == "pdf":
+                return self._process_pdf(source)
             else:
-                raise ValueError(f"Unsupported file type: {file_type}")
+                return self._process_text(source)
         
         except Exception as e:
             raise Exception(f"Error processing file: {str(e)}")
     
-    def _process_pdf(self, file_path: str) -> str:
+    def _detect_kind(self, source: Source, file_type: str, file_name: str = "") -> str:
+        """Return "pdf" or "text" for a source, from its MIME type or file name"""
+        name = source if isinstance(source, str) else file_name
+        if file_type == "application/pdf" or name.endswith('.pdf'):
+            return "pdf"
+        elif file_type == "text/plain" or name.endswith('.txt'):
+            return "text"
+        raise ValueError(f"Unsupported file type: {file_type}")
+    
+    def _process_pdf(self, source: Source) -> str:
         """
         Process PDF file and extract text
         
         Args:
-            file_path (str): Path to PDF file
+            source (Source): Path to PDF file or its content
         
         Returns:
             str: Extracted text content
         """
         try:
-            # Use PyPDF2 to extract text from PDF
-            text_content = []
-            
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                
-                # Extract text from each page
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    page_text = page.extract_text()
-                    if page_text.strip():
-                        text_content.append(page_text.strip())
+            if self.max_chars is not None:
+                # Only read as many pages as the budget needs; one extra character lets
+                # _clean_text see that the document was longer than the budget
+                with metrics.stage("pdf_parse"):
+                    text_content = list(self.iter_text(source, "application/pdf", max_chars=self.max_chars + 1))
+            else:
+                with metrics.stage("pdf_parse"):
+                    pages = self._extract_all_pages(source)
+                with metrics.stage("clean"):
+                    if self.strip_headers:
+                        pages = self._strip_headers_footers(iter(pages))
+                    text_content = [piece for piece in map(self._normalize, pages) if piece]
             
             if not text_content:
                 raise Exception("No text content could be extracted from the PDF")
             
             # Join all text content
-            full_text = "\n\n".join(text_content)
+            full_text = PIECE_SEPARATOR.join(text_content)
             
-            # Basic cleaning
-            full_text = self._clean_text(full_text)
+            # Basic cleaning; every piece is already normalized
+            with metrics.stage("clean"):
+                full_text = self._clean_text(full_text, normalized=True)
             
             return full_text
         
         except Exception as e:
             raise Exception(f"Failed to process PDF: {str(e)}")
     
-    def _process_text(self, file_path: str) -> str:
+    def _extract_all_pages(self, source: Source) -> List[str]:
+        """Extract every page, spreading large files across processes"""
+        with _open_binary(source, self.mmap_min_bytes) as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            num_pages = len(pdf_reader.pages)
+            
+            if self.pdf_workers <= 1 or num_pages < self.parallel_min_pages:
+                page_texts = (page.extract_text().strip() for page in pdf_reader.pages)
+                return [page_text for page_text in page_texts if page_text]
+        
+        return self._extract_pages_parallel(source, num_pages)
+    
+    def iter_pages(self, source: Source, file_type: str, file_name: str = "") -> Iterator[str]:
+        """
+        Lazily yield the raw text of a document one page at a time
+        
+        PDF pages are only parsed when the consumer asks for them. Text files have no
+        pages, so they are yielded one paragraph (blank-line separated block) at a time.
+        
+        Args:
+            source (Source): Path to the file or its content
+            file_type (str): MIME type of the file
+            file_name (str): Original file name, used when the MIME type is missing
+        
+        Yields:
+            str: Non-empty stripped page or paragraph text
+        """
+        if self._detect_kind(source, file_type, file_name) == "pdf":
+            with _open_binary(source, self.mmap_min_bytes) as file:
+                pdf_reader = PyPDF2.PdfReader(file)
+                for page in pdf_reader.pages:
+                    page_text = page.extract_text().strip()
+                    if page_text:
+                        yield page_text
+        else:
+            with self._open_text(source) as file:
+                paragraph = []
+                for line in file:
+                    if line.strip():
+                        paragraph.append(line)
+                    elif paragraph:
+                        yield "".join(paragraph).strip()
+                        paragraph = []
+                if paragraph:
+                    yield "".join(paragraph).strip()
+    
+    @contextmanager
+    def _open_text(self, source: Source) -> Iterator[io.TextIOBase]:
+        """Open any Source as a UTF-8 text stream"""
+        if isinstance(source, str):
+            with open(source, 'r', encoding='utf-8') as file:
+                yield file
+            return
+        
+        with _open_binary(source) as binary:
+            text_stream = io.TextIOWrapper(binary, encoding='utf-8')
+            try:
+                yield text_stream
+            finally:
+                # Detach so the wrapper does not close a stream the caller still owns
+                text_stream.detach()
+    
+    def iter_text(self, source: Source, file_type: str, max_chars: Optional[int] = None,
+                  max_tokens: Optional[int] = None, file_name: str = "") -> Iterator[str]:
+        """
+        Lazily yield normalized text, stopping once a character or token budget is met
+        
+        Pieces joined with PIECE_SEPARATOR never exceed the budget, and no page past
+        the budget is read.
+        
+        Args:
+            source (Source): Path to the file or its content
+            file_type (str): MIME type of the file
+            max_chars (int): Maximum number of characters to yield
+            max_tokens (int): Maximum number of tokens to yield (estimated from characters)
+            file_name (str): Original file name, used when the MIME type is missing
+        
+        Yields:
+            str: Normalized text of consecutive pages or paragraphs
+        """
+        budgets = [b for b in (max_chars, max_tokens * CHARS_PER_TOKEN if max_tokens is not None else None) if b is not None]
+        remaining = min(budgets) if budgets else None
+        
+        pages = self.iter_pages(source, file_type, file_name)
+        try:
+            page_texts = pages
+            if self.strip_headers and self._detect_kind(source, file_type, file_name) == "pdf":
+                page_texts = self._strip_headers_footers(pages, max_chars=remaining)
+            
+            first = True
+            for page_text in page_texts:
+                piece = self._normalize(page_text)
+                if not piece:
+                    continue
+                if remaining is not None:
+                    if not first:
+                        remaining -= len(PIECE_SEPARATOR)
+                    if remaining <= 0:
+                        return
+                    piece = piece[:remaining]
+                    remaining -= len(piece)
+                first = False
+                yield piece
+                if remaining is not None and remaining <= 0:
+                    return
+        finally:
+            # Close the underlying file as soon as the budget is met
+            pages.close()
+    
+    def _extract_pages_parallel(self, source: Source, num_pages: int) -> List[str]:
+        """
+        Extract page text with a process pool, keeping page order
+        
+        Args:
+            source (Source): Path to PDF file or its content
+            num_pages (int): Number of pages in the PDF
+        
+        Returns:
+            List[str]: Non-empty page texts in page order
+        """
+        # Workers reopen paths themselves; in-memory content is sent to each worker once as bytes
+        if not isinstance(source, (str, bytes)):
+            with _open_binary(source) as file:
+                source = file.read()
+        
+        workers = min(self.pdf_workers, num_pages)
+        # A few ranges per worker evens out pages that are much slower to parse than others
+        num_ranges = min(num_pages, workers * 4)
+        bounds = [round(i * num_pages / num_ranges) for i in range(num_ranges + 1)]
+        
+        # Spawned workers never inherit the Streamlit server's threads and locks, which forking would copy mid-use
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_pdf_worker, initargs=(source,)) as executor:
+            futures = [
+                executor.submit(_extract_page_range, start, end)
+                for start, end in zip(bounds, bounds[1:])
+            ]
+            text_content = []
+            for future in futures:
+                text_content.extend(future.result())
+        
+        return text_content
+    
+    def _process_text(self, source: Source) -> str:
         """
         Process text file
         
         Args:
-            file_path (str): Path to text file
+            source (Source): Path to text file or its content
         
         Returns:
             str: Processed text content
         """
         try:
-            # Read text file directly
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
+            normalized = self.max_chars is not None
+            with metrics.stage("text_read"):
+                if normalized:
+                    # Stop reading once the budget is met instead of loading the whole file
+                    content = PIECE_SEPARATOR.join(self.iter_text(source, "text/plain", max_chars=self.max_chars + 1))
+                elif isinstance(source, (bytes, bytearray, memoryview)):
+                    # Decode straight from the buffer
+                    content = str(source, 'utf-8')
+                else:
+                    # Read text file directly
+                    with self._open_text(source) as file:
+                        content = file.read()
             
             if not content.strip():
                 raise Exception("The text file appears to be empty")
             
             # Basic cleaning
-            full_text = self._clean_text(content)
+            with metrics.stage("clean"):
+                full_text = self._clean_text(content, normalized=normalized)
             
             return full_text
         
         except Exception as e:
             raise Exception(f"Failed to process text file: {str(e)}")
     
-    def _clean_text(self, text: str) -> str:
+    def _clean_text(self, text: str, normalized: bool = False) -> str:
         """
         Clean and normalize text content
         
         Args:
             text (str): Raw text content
+            normalized (bool): Skip normalization for text already built from _normalize output
         
         Returns:
             str: Cleaned text content
         """
-        # Remove excessive whitespace
-        text = " ".join(text.split())
-        
-        # Remove multiple consecutive newlines
-        while "\n\n\n" in text:
-            text = text.replace("\n\n\n", "\n\n")
+        # Remove excessive whitespace, keeping paragraph breaks
+        if not normalized:
+            text = self._normalize(text)
         
         # Ensure minimum length
         if len(text.strip()) < 100:
             raise Exception("The extracted text is too short to generate meaningful questions (minimum 100 characters required)")
         
         # Ensure maximum length for API limits
-        if len(text) > 8000:
-            text = text[:8000] + "..."
+        if self.max_chars is not None and len(text) > self.max_chars:
+            text = text[:self.max_chars] + "..."
         
         return text.strip()
     
+    def _normalize(self, text: str) -> str:
+        """
+        Normalize whitespace while keeping paragraph structure
+        
+        Blank-line separated blocks become paragraphs joined by a single blank line;
+        inside a paragraph every run of whitespace (including wrapped lines) becomes
+        one space. Optionally re-joins words hyphenated across line breaks.
+        
+        Args:
+            text (str): Raw text content
+        
+        Returns:
+            str: Normalized text
+        """
+        if self.dehyphenate:
+            text = _HYPHENATED_BREAK.sub('', text)
+        
+        paragraphs = (" ".join(block.split()) for block in _PARAGRAPH_BREAK.split(text))
+        return PIECE_SEPARATOR.join(paragraph for paragraph in paragraphs if paragraph)
+    
+    def _strip_headers_footers(self, pages: Iterator[str], max_chars: Optional[int] = None) -> Iterator[str]:
+        """
+        Drop running headers, footers and page numbers from a stream of raw page texts
+        
+        The first and last two lines of each of the first header_sample_pages pages are
+        compared with digits masked out; lines that repeat on at least half of the sample
+        are treated as boilerplate and removed from every page. With max_chars, sampling
+        also stops once the sampled text covers that budget, so a budgeted read never
+        parses a page it would not use (a budget of fewer than three pages strips nothing).
+        
+        Args:
+            pages (Iterator[str]): Raw page texts in page order
+            max_chars (int): Character budget of the consumer, None for no budget
+        
+        Yields:
+            str: Page texts without boilerplate lines
+        """
+        sample = []
+        sampled_chars = 0
+        for page in pages:
+            sample.append(page)
+            sampled_chars += len(page)
+            # Normalizing only shrinks text, so pages past this point would not be read anyway
+            if len(sample) >= self.header_sample_pages or (max_chars is not None and sampled_chars >= max_chars):
+                break
+        
+        counts = Counter()
+        for page in sample:
+            counts.update(set(map(self._boilerplate_key, self._edge_lines(page.splitlines()))))
+        threshold = max(3, (len(sample) + 1) // 2)
+        boilerplate = {key for key, count in counts.items() if key and count >= threshold}
+        
+        for page in sample:
+            yield self._remove_boilerplate(page, boilerplate)
+        for page in pages:
+            yield self._remove_boilerplate(page, boilerplate)
+    
+    def _remove_boilerplate(self, page: str, boilerplate: set) -> str:
+        """Remove boilerplate lines from the top and bottom edges of a page"""
+        if not boilerplate:
+            return page
+        
+        lines = page.splitlines()
+        edges = set(self._edge_lines(range(len(lines))))
+        return "\n".join(
+            line for i, line in enumerate(lines)
+            if i not in edges or self._boilerplate_key(line) not in boilerplate
+        )
+    
+    @staticmethod
+    def _edge_lines(lines):
+        """First two and last two items of a sequence"""
+        return list(lines[:2]) + list(lines[-2:])
+    
+    @staticmethod
+    def _boilerplate_key(line: str) -> str:
+        return _DIGITS.sub('#', " ".join(line.split()).lower())
+    
     def validate_file(self, file_path: str, max_size_mb: int = 10) -> bool:
         """
         Validate uploaded file
@@ -0,0 +1,268 @@
+import csv
+import datetime
+import json
+
+# Column order of the CSV export
+CSV_COLUMNS = [
+    'Question_Number', 'Type', 'Question', 'Option_A', 'Option_B', 'Option_C', 'Option_D',
+    'Correct_Answer', 'Explanation'
+]
+
+class _RowBuffer:
+    """Write target for csv.writer that hands back each formatted row"""
+    
+    def __init__(self):
+        self.row = ""
+    
+    def write(self, row):
+        self.row = row
+
+def _join_lines(lines):
+    """Stream lines joined by newlines, like "\n".join(lines) without building the list"""
+    first = True
+    for line in lines:
+        yield line if first else "\n" + line
+        first = False
+
+def _buffered(pieces, size=64 * 1024):
+    """Merge many small pieces into chunks of about size characters"""
+    buffer, length = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield "".join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+def iter_csv(quiz_data):
+    """Stream the CSV export one row at a time"""
+    buffer = _RowBuffer()
+    writer = csv.writer(buffer, lineterminator="\n")
+    
+    writer.writerow(CSV_COLUMNS)
+    yield buffer.row
+    
+    # Multiple choice questions
+    for i, mcq in enumerate(quiz_data['multiple_choice']):
+        options = mcq['options']
+        writer.writerow([
+            f"MC{i+1}",
+            'Multiple Choice',
+            mcq['question'],
+            options[0] if len(options) > 0 else '',
+            options[1] if len(options) > 1 else '',
+            options[2] if len(options) > 2 else '',
+            options[3] if len(options) > 3 else '',
+            mcq['correct_answer'],
+            mcq.get('explanation', '')
+        ])
+        yield buffer.row
+    
+    # True/False questions
+    for i, tf in enumerate(quiz_data['true_false']):
+        writer.writerow([
+            f"TF{i+1}",
+            'True/False',
+            tf['question'],
+            'True',
+            'False',
+            '',
+            '',
+            'True' if tf['correct_answer'] else 'False',
+            tf.get('explanation', '')
+        ])
+        yield buffer.row
+
+def iter_text(quiz_data):
+    """Stream the formatted text export"""
+    return _join_lines(_text_lines(quiz_data))
+
+def _text_lines(quiz_data):
+    yield "AI GENERATED QUIZ"
+    yield "=" * 50
+    yield ""
+    
+    # Multiple Choice Questions
+    yield "MULTIPLE CHOICE QUESTIONS"
+    yield "-" * 30
+    yield ""
+    
+    for i, mcq in enumerate(quiz_data['multiple_choice']):
+        yield f"Question {i+1}: {mcq['question']}"
+        yield ""
+        for j, option in enumerate(mcq['options']):
+            prefix = chr(65 + j)  # A, B, C, D
+            marker = " [CORRECT]" if option == mcq['correct_answer'] else ""
+            yield f"{prefix}. {option}{marker}"
+        yield ""
+        yield f"Explanation: {mcq.get('explanation', 'No explanation provided')}"
+        yield ""
+        yield "-" * 30
+        yield ""
+    
+    # True/False Questions
+    yield "TRUE/FALSE QUESTIONS"
+    yield "-" * 20
+    yield ""
+    
+    for i, tf in enumerate(quiz_data['true_false']):
+        yield f"Question {i+1}: {tf['question']}"
+        yield ""
+        correct_answer = "True" if tf['correct_answer'] else "False"
+        yield f"Answer: {correct_answer}"
+        yield ""
+        yield f"Explanation: {tf.get('explanation', 'No explanation provided')}"
+        yield ""
+        yield "-" * 20
+        yield ""
+
+def iter_html(quiz_data, generated_at=None):
+    """Stream the print-friendly HTML document"""
+    generated_at = generated_at or datetime.datetime.now()
+    yield f"""    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>Quiz - Print Version</title>
+        <style>
+            body {{ 
+                font-family: Arial, sans-serif; 
+                margin: 20px; 
+                line-height: 1.6;
+                color: #333;
+            }}
+            .header {{
+                text-align: center;
+                border-bottom: 3px solid #dc2626;
+                padding-bottom: 20px;
+                margin-bottom: 30px;
+            }}
+            .question-section {{
+                margin-bottom: 40px;
+            }}
+            .question {{
+                background: #f9f9f9;
+                padding: 15px;
+                border-left: 4px solid #dc2626;
+                margin-bottom: 20px;
+                border-radius: 5px;
+            }}
+            .question-title {{
+                font-weight: bold;
+                margin-bottom: 10px;
+                color: #dc2626;
+            }}
+            .options {{
+                margin: 10px 0;
+            }}
+            .correct {{
+                background: #dcfce7;
+                font-weight: bold;
+                color: #15803d;
+            }}
+            .explanation {{
+                background: #eff6ff;
+                padding: 10px;
+                margin-top: 10px;
+                border-radius: 3px;
+                font-style: italic;
+            }}
+            @media print {{
+                .no-print {{ display: none; }}
+                body {{ margin: 0; }}
+            }}
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h1>🎯 AI Generated Quiz</h1>
+            <p>Generated on {generated_at.strftime('%B %d, %Y at %I:%M %p')}</p>
+        </div>
+        
+        <div class="question-section">
+            <h2>📝 Multiple Choice Questions</h2>
+    """
+    
+    # Add multiple choice questions
+    for i, mcq in enumerate(quiz_data['multiple_choice']):
+        yield f"""
+            <div class="question">
+                <div class="question-title">Question {i+1}: {mcq['question']}</div>
+                <div class="options">
+        """
+        for j, option in enumerate(mcq['options']):
+            prefix = chr(65 + j)  # A, B, C, D
+            correct_class = "correct" if option == mcq['correct_answer'] else ""
+            yield f'<div class="{correct_class}">{prefix}. {option}</div>'
+        
+        yield f"""
+                </div>
+                <div class="explanation"><strong>Explanation:</strong> {mcq.get('explanation', 'No explanation provided')}</div>
+            </div>
+        """
+    
+    # Add true/false questions
+    yield """
+        </div>
+        
+        <div class="question-section">
+            <h2>✅ True/False Questions</h2>
+    """
+    
+    for i, tf in enumerate(quiz_data['true_false']):
+        correct_answer = "True" if tf['correct_answer'] else "False"
+        yield f"""
+            <div class="question">
+                <div class="question-title">Question {i+1}: {tf['question']}</div>
+                <div class="options correct">Answer: {correct_answer}</div>
+                <div class="explanation"><strong>Explanation:</strong> {tf.get('explanation', 'No explanation provided')}</div>
+            </div>
+        """
+    
+    yield """
+        </div>
+    </body>
+    </html>
+"""
+
+def iter_json(quiz_data):
+    """Stream the JSON export (same text as json.dumps(quiz_data, indent=2))"""
+    return _buffered(json.JSONEncoder(indent=2).iterencode(quiz_data))
+
+# Export format -> streaming writer
+EXPORT_WRITERS = {
+    "csv": iter_csv,
+    "txt": iter_text,
+    "html": iter_html,
+    "json": iter_json,
+}
+
+def write_export(quiz_data, export_format, file):
+    """
+    Stream an export into an open text file without building it in memory
+    
+    Args:
+        quiz_data (dict): Quiz data
+        export_format (str): Key of EXPORT_WRITERS
+        file: Writable text file (open CSV files with newline="")
+    """
+    for chunk in EXPORT_WRITERS[export_format](quiz_data):
+        file.write(chunk)
+
+def create_csv_export(quiz_data):
+    """Create CSV export of quiz data"""
+    return "".join(iter_csv(quiz_data))
+
+def create_text_export(quiz_data):
+    """Create formatted text export of quiz data"""
+    return "".join(iter_text(quiz_data))
+
+def create_print_version(quiz_data):
+    """Create HTML for print-friendly version"""
+    # The document is written into a new window from a JS template literal
+    return (
+        "\n    <script>\n    const printWindow = window.open('', '_blank');\n    printWindow.document.write(`\n"
+        + "".join(iter_html(quiz_data))
+        + "    `);\n    printWindow.document.close();\n    printWindow.print();\n    </script>\n    "
+    )
@@ -0,0 +1,191 @@
+import contextvars
+import re
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class QuizStats:
+    """
+    Stage timings and counters for one operation (a quiz, an upload)
+
+    Stage times are summed over every call, so stages that run in concurrent requests
+    (model latency, parsing) can add up to more than the operation's wall time.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self):
+        with self._lock:
+            stages = {name: round(seconds, 4) for name, seconds in self.stages.items()}
+            return {"stages_s": stages, **self.counters}
+
+
+class MetricsSink:
+    """Destination for process-wide metrics; the default sink discards everything"""
+
+    def timing(self, name, seconds, tags=None):
+        pass
+
+    def increment(self, name, value=1, tags=None):
+        pass
+
+
+class StatsdSink(MetricsSink):
+    """Send metrics to a StatsD agent over UDP (DogStatsD-style tags)"""
+
+    def __init__(self, host="127.0.0.1", port=8125, prefix="quizgenius"):
+        self.address = (host, port)
+        self.prefix = prefix
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def timing(self, name, seconds, tags=None):
+        self._send(f"{self.prefix}.{name}:{seconds * 1000:.3f}|ms", tags)
+
+    def increment(self, name, value=1, tags=None):
+        self._send(f"{self.prefix}.{name}:{value}|c", tags)
+
+    def _send(self, line, tags):
+        if tags:
+            line += "|#" + ",".join(f"{key}:{value}" for key, value in sorted(tags.items()))
+        try:
+            self._socket.sendto(line.encode("utf-8"), self.address)
+        except OSError:
+            # Metrics must never break quiz generation
+            pass
+
+
+class PrometheusSink(MetricsSink):
+    """Keep metrics in memory and expose them in the Prometheus text format"""
+
+    def __init__(self, prefix="quizgenius"):
+        self.prefix = prefix
+        self._counters = {}
+        self._timings = {}
+        self._lock = threading.Lock()
+
+    def timing(self, name, seconds, tags=None):
+        key = self._key(f"{name}_seconds", tags)
+        with self._lock:
+            total, count = self._timings.get(key, (0.0, 0))
+            self._timings[key] = (total + seconds, count + 1)
+
+    def increment(self, name, value=1, tags=None):
+        key = self._key(f"{name}_total", tags)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def render(self):
+        """Current metrics as Prometheus exposition text"""
+        lines = []
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                lines.append(f"{name}{labels} {value}")
+            for (name, labels), (total, count) in sorted(self._timings.items()):
+                lines.append(f"{name}_sum{labels} {total:.6f}")
+                lines.append(f"{name}_count{labels} {count}")
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port=9108, host="127.0.0.1"):
+        """Serve /metrics from a daemon thread and return the server"""
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = sink.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def _key(self, name, tags):
+        name = re.sub(r"[^a-zA-Z0-9_]", "_", f"{self.prefix}_{name}")
+        labels = ",".join(f'{key}="{value}"' for key, value in sorted((tags or {}).items()))
+        return name, f"{{{labels}}}" if labels else ""
+
+
+_sink = MetricsSink()
+_active_stats = contextvars.ContextVar("quiz_stats", default=None)
+
+
+def set_sink(sink):
+    """Install the process-wide metrics sink (None restores the no-op sink)"""
+    global _sink
+    _sink = sink or MetricsSink()
+
+
+@contextmanager
+def collect(stats=None):
+    """
+    Record stages and counters of the enclosed code into stats
+
+    Worker threads see the same stats when started through run_with (asyncio.to_thread
+    copies the context already).
+
+    Yields:
+        QuizStats: The stats being recorded into
+    """
+    stats = stats or QuizStats()
+    token = _active_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+
+@contextmanager
+def stage(name, tags=None):
+    """Time the enclosed block as a stage of the active stats and report it to the sink"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_time(name, time.perf_counter() - start, tags)
+
+
+def record_time(name, seconds, tags=None):
+    stats = _active_stats.get()
+    if stats is not None:
+        stats.add_time(name, seconds)
+    _sink.timing(name, seconds, tags)
+
+
+def count(name, value=1, tags=None):
+    """Add to a counter of the active stats and report it to the sink"""
+    stats = _active_stats.get()
+    if stats is not None:
+        stats.count(name, value)
+    _sink.increment(name, value, tags)
+
+
+def current_stats():
+    """The stats being recorded into in this context, or None"""
+    return _active_stats.get()
+
+
+def run_with(stats, func, *args, **kwargs):
+    """Call func in a copy of the current context with stats active (for worker threads)"""
+    context = contextvars.copy_context()
+    context.run(_active_stats.set, stats)
+    return context.run(func, *args, **kwargs)
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import google.generativeai as genai
+from google.api_core import exceptions as api_exceptions
+from response_parser import QUESTION_SCHEMAS, chunk_text
+from prompt_budget import estimate_tokens
+import metrics
+
+# Configured models shared by every generator in the process, keyed by (api_key, model_name)
+_MODELS = {}
+_MODELS_LOCK = threading.Lock()
+_configured_key = None
+
+
+def get_model(api_key, model_name='gemini-1.5-flash'):
+    """
+    Return the process-wide model client for an API key and model name
+
+    genai.configure and GenerativeModel build the transport and its connections, so
+    they run once per key and model instead of once per quiz. The client is thread-safe.
+
+    Args:
+        api_key (str): Gemini API key
+        model_name (str): Gemini model name
+
+    Returns:
+        genai.GenerativeModel: Configured model
+    """
+    global _configured_key
+    with _MODELS_LOCK:
+        model = _MODELS.get((api_key, model_name))
+        if model is None:
+            # genai keeps one global configuration, so reconfigure only when the key changes
+            if api_key != _configured_key:
+                genai.configure(api_key=api_key)
+                _configured_key = api_key
+            model = _MODELS[(api_key, model_name)] = genai.GenerativeModel(model_name)
+        return model
+
+
+class ModelBackend:
+    """
+    Interface between QuizGenerator and a text generation model
+
+    A backend streams the raw response text for one question request. Errors are raised
+    as-is so the retry policy can tell transient failures from permanent ones. Backends
+    report prompt_tokens and response_tokens through metrics.count.
+    """
+
+    model_name = None
+
+    def stream_text(self, prompt, question_type, num_questions, max_output_tokens, timeout=None):
+        """
+        Send one request and yield the response text piece by piece
+
+        Args:
+            prompt (str): Full prompt text
+            question_type (str): Question type key, selects the response schema
+            num_questions (int): Number of questions requested
+            max_output_tokens (int): Output token budget
+            timeout (float): Request timeout in seconds
+
+        Yields:
+            str: Response text pieces in order
+        """
+        raise NotImplementedError
+
+
+class GeminiBackend(ModelBackend):
+    """Google Gemini in JSON mode with a response schema per question type"""
+
+    def __init__(self, api_key, model_name='gemini-1.5-flash', temperature=0.7):
+        self.model_name = model_name
+        self.model = get_model(api_key, model_name)
+        self.temperature = temperature
+
+    def stream_text(self, prompt, question_type, num_questions, max_output_tokens, timeout=None):
+        response = self.model.generate_content(
+            prompt,
+            generation_config=genai.GenerationConfig(
+                temperature=self.temperature,
+                max_output_tokens=max_output_tokens,
+                response_mime_type="application/json",
+                response_schema=QUESTION_SCHEMAS[question_type],
+            ),
+            stream=True,
+            request_options={"timeout": timeout} if timeout else None
+        )
+        usage = None
+        for chunk in response:
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            yield chunk_text(chunk)
+
+        # The final chunk carries the billed token counts
+        if usage is not None:
+            metrics.count("prompt_tokens", usage.prompt_token_count)
+            metrics.count("response_tokens", usage.candidates_token_count)
+
+
+class StubBackend(ModelBackend):
+    """
+    Local stand-in model for load tests and benchmarks
+
+    Returns schema-valid questions built from words of the prompt. Latency, transient
+    errors and malformed (truncated) responses are injected at the configured rates.
+    Every outcome is derived from the seed, the prompt and how often that prompt was
+    sent, so runs are reproducible regardless of thread scheduling.
+    """
+
+    model_name = "stub"
+
+    def __init__(self, latency=0.0, latency_jitter=0.0, error_rate=0.0, malformed_rate=0.0,
+                 chunk_chars=64, chunk_delay=0.0, seed=0):
+        """
+        Initialize the stub
+
+        Args:
+            latency (float): Seconds before the first piece of a response
+            latency_jitter (float): Extra random latency of up to this many seconds
+            error_rate (float): Probability that a request fails with ServiceUnavailable
+            malformed_rate (float): Probability that a response is cut off mid-JSON
+            chunk_chars (int): Characters per streamed piece
+            chunk_delay (float): Seconds between streamed pieces
+            seed (int): Seed for every random choice
+        """
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.chunk_chars = max(1, chunk_chars)
+        self.chunk_delay = chunk_delay
+        self.seed = seed
+        self.calls = 0
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def stream_text(self, prompt, question_type, num_questions, max_output_tokens, timeout=None):
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        with self._lock:
+            self.calls += 1
+            attempt = self._attempts.get(prompt_hash, 0)
+            self._attempts[prompt_hash] = attempt + 1
+        rng = random.Random(f"{self.seed}:{prompt_hash}:{attempt}")
+
+        time.sleep(self.latency + rng.uniform(0, self.latency_jitter))
+        if rng.random() < self.error_rate:
+            raise api_exceptions.ServiceUnavailable("Stub backend injected failure")
+
+        text = json.dumps({"questions": self._questions(prompt, prompt_hash, question_type, num_questions, rng)})
+        if rng.random() < self.malformed_rate:
+            text = text[:rng.randrange(1, len(text))]
+        metrics.count("prompt_tokens", estimate_tokens(prompt))
+        metrics.count("response_tokens", estimate_tokens(text))
+
+        for start in range(0, len(text), self.chunk_chars):
+            if start and self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield text[start:start + self.chunk_chars]
+
+    @staticmethod
+    def _questions(prompt, prompt_hash, question_type, num_questions, rng):
+        words = re.findall(r"[A-Za-z]{5,}", prompt) or ["content"]
+        questions = []
+        for i in range(num_questions):
+            topic = rng.choice(words)
+            question = {
+                "question": f"[{prompt_hash}-{i}] Which statement about '{topic}' is supported by the text?",
+                "explanation": f"The text discusses '{topic}'.",
+            }
+            if question_type == "true_false":
+                question["correct_answer"] = rng.random() < 0.5
+            else:
+                options = [f"{rng.choice(words)} statement {letter}" for letter in "ABCD"]
+                question["options"] = options
+                question["correct_answer"] = rng.choice(options)
+            questions.append(question)
+        return questions
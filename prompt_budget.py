@@ -0,0 +1,85 @@
+import math
+
+# Rough characters-per-token ratio for English prose; good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+# Published context limits; unknown models fall back to the smallest entry
+MODEL_LIMITS = {
+    "gemini-1.5-flash": {"input_tokens": 1_048_576, "output_tokens": 8192},
+    "gemini-1.5-pro": {"input_tokens": 2_097_152, "output_tokens": 8192},
+    "gemini-2.0-flash": {"input_tokens": 1_048_576, "output_tokens": 8192},
+}
+_DEFAULT_LIMITS = {"input_tokens": 32_768, "output_tokens": 2048}
+
+# Typical JSON size of one generated question, measured on real responses with some headroom
+OUTPUT_TOKENS_PER_QUESTION = {
+    "multiple_choice": 160,
+    "true_false": 90,
+}
+
+# Instructions, schema example and JSON wrapper around the questions
+PROMPT_OVERHEAD_TOKENS = 350
+RESPONSE_OVERHEAD_TOKENS = 40
+
+
+def estimate_tokens(text):
+    """Estimate the token count of a string"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class PromptBudget:
+    """Size prompt context and output tokens from the question count and model limits"""
+
+    def __init__(self, model_name, max_context_tokens=6000, context_tokens_per_question=400,
+                 min_context_tokens=1000, output_margin=1.25):
+        """
+        Initialize the budget
+
+        Args:
+            model_name (str): Model the prompts are sent to
+            max_context_tokens (int): Upper bound on source text tokens per request
+            context_tokens_per_question (int): Source text tokens to provide per requested question
+            min_context_tokens (int): Lower bound on source text tokens per request
+            output_margin (float): Multiplier on the expected response size to avoid truncation
+        """
+        self.limits = MODEL_LIMITS.get(model_name, _DEFAULT_LIMITS)
+        self.max_context_tokens = max_context_tokens
+        self.context_tokens_per_question = context_tokens_per_question
+        self.min_context_tokens = min_context_tokens
+        self.output_margin = output_margin
+
+    def output_tokens(self, question_type, num_questions):
+        """
+        Output token budget for a request
+
+        Args:
+            question_type (str): Question type key, e.g. "multiple_choice"
+            num_questions (int): Number of questions requested
+
+        Returns:
+            int: max_output_tokens for the request
+        """
+        per_question = OUTPUT_TOKENS_PER_QUESTION.get(question_type, max(OUTPUT_TOKENS_PER_QUESTION.values()))
+        expected = RESPONSE_OVERHEAD_TOKENS + per_question * num_questions
+        return min(self.limits["output_tokens"], math.ceil(expected * self.output_margin))
+
+    def context_tokens(self, question_type, num_questions):
+        """
+        Source text token budget for a request
+
+        Args:
+            question_type (str): Question type key
+            num_questions (int): Number of questions requested
+
+        Returns:
+            int: Tokens of source text to include
+        """
+        wanted = max(self.min_context_tokens, self.context_tokens_per_question * num_questions)
+        wanted = min(wanted, self.max_context_tokens)
+        # Never exceed what the model accepts alongside the instructions and the response
+        available = self.limits["input_tokens"] - PROMPT_OVERHEAD_TOKENS - self.output_tokens(question_type, num_questions)
+        return max(0, min(wanted, available))
+
+    def context_chars(self, question_type, num_questions):
+        """Source text budget for a request in characters"""
+        return self.context_tokens(question_type, num_questions) * CHARS_PER_TOKEN
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class QuizCache:
+    """Content-addressed on-disk cache for generated quizzes"""
+
+    def __init__(self, cache_dir=".quiz_cache", max_entries=500, max_bytes=200 * 1024 * 1024, ttl_seconds=7 * 24 * 3600):
+        """
+        Initialize the cache
+
+        Args:
+            cache_dir (str): Directory holding one JSON file per cached quiz
+            max_entries (int): Maximum number of cached quizzes
+            max_bytes (int): Maximum total size of the cache directory in bytes
+            ttl_seconds (int): Age after which an entry is treated as missing (None to disable)
+        """
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text_content, counts, difficulty, model_name, prompt_version):
+        """
+        Build the cache key for a quiz request
+
+        Args:
+            text_content (str): The processed text content
+            counts (dict): Question type -> number of questions
+            difficulty (str): Difficulty level
+            model_name (str): Name of the model generating the quiz
+            prompt_version (int): Version of the prompt templates
+
+        Returns:
+            str: Hex digest identifying the request
+        """
+        text_hash = hashlib.sha256(text_content.encode("utf-8")).hexdigest()
+        payload = json.dumps({
+            "text": text_hash,
+            "counts": counts,
+            "difficulty": difficulty,
+            "model": model_name,
+            "prompt_version": prompt_version,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Return the cached quiz for key, or None on a miss
+
+        Args:
+            key (str): Key from make_key
+
+        Returns:
+            dict: Cached quiz data, or None
+        """
+        path = self._path(key)
+        try:
+            # mtime is when the entry was written, so the TTL counts from creation however often it is read
+            written = os.path.getmtime(path)
+            if self.ttl_seconds is not None and time.time() - written > self.ttl_seconds:
+                self._remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as file:
+                quiz_data = json.load(file)
+            # Record the read in atime only, so eviction is least-recently-used rather than oldest-written
+            os.utime(path, (time.time(), written))
+            return quiz_data
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key, quiz_data):
+        """
+        Store a quiz and evict old entries if the cache is over its limits
+
+        Args:
+            key (str): Key from make_key
+            quiz_data (dict): Quiz data to store
+        """
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(quiz_data, file)
+            # Atomic rename so readers in other sessions or processes never see a partial file
+            os.replace(tmp_path, path)
+        except OSError:
+            self._remove(tmp_path)
+            return
+        self._evict()
+
+    def clear(self):
+        """Remove every cached quiz"""
+        for entry in self._entries():
+            self._remove(entry[2])
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _entries(self):
+        """Return (last access time, size, path) for every cache file"""
+        entries = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, path))
+        return entries
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its limits"""
+        with self._lock:
+            entries = sorted(self._entries())
+            total_bytes = sum(size for _, size, _ in entries)
+            while entries and (len(entries) > self.max_entries or total_bytes > self.max_bytes):
+                _, size, path = entries.pop(0)
+                self._remove(path)
+                total_bytes -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -1,14 +1,76 @@
-import json
-import os
-import google.generativeai as genai
+import time
+import queue
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from text_index import build_index
+from prompt_budget import PromptBudget, estimate_tokens
+from response_parser import IncrementalQuestionParser, decode_response, validate_question
+from model_backends import GeminiBackend
+from resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+import metrics
+
+# Bump whenever the prompt templates change so cached quizzes from older prompts are not reused
+PROMPT_VERSION = 4
+
+# Existing questions listed in a prompt as "do not repeat", and the characters kept of each
+MAX_EXCLUDED_QUESTIONS = 50
+MAX_EXCLUDED_CHARS = 160
+
+# Lines of a response starting with these are JSON fragments, which manual extraction skips
+JSON_FRAGMENT_PREFIXES = ('{', '[', '"')
+
+# Human-readable question type names used in messages
+QUESTION_TYPE_LABELS = {
+    "multiple_choice": "multiple choice",
+    "true_false": "true/false",
+}
 
 class QuizGenerator:
-    def __init__(self, api_key):
-        """Initialize the quiz generator with Gemini API key"""
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+    def __init__(self, api_key, max_concurrency=10, batch_size=10, budget=None, cache=None, model_name='gemini-1.5-flash',
+                 retry_policy=None, circuit_breaker=None, refill_rounds=1, scheduler=None, session_id="default", priority=0,
+                 backend=None):
+        """
+        Initialize the quiz generator with Gemini API key
+
+        Args:
+            api_key (str): Gemini API key
+            max_concurrency (int): Maximum number of model requests in flight at once
+            batch_size (int): Maximum number of questions asked for in a single request
+            budget (PromptBudget): Sizes source context and output tokens per request (defaults to the model's limits)
+            cache (QuizCache): Optional cache for generated quizzes
+            model_name (str): Gemini model to generate questions with
+            retry_policy (RetryPolicy): Backoff and deadline for model calls
+            circuit_breaker (CircuitBreaker): Fails fast after repeated model failures
+            refill_rounds (int): Extra rounds that re-request only the questions still missing
+            scheduler (RequestScheduler): Optional shared rate limiter every model request waits on
+            session_id (str): Identity used by the scheduler to share throughput fairly
+            priority (int): Scheduler priority of this generator's requests (lower goes first)
+            backend (ModelBackend): Model to send requests to (defaults to Gemini; api_key is unused when given)
+        """
+        self.backend = backend or GeminiBackend(api_key, model_name)
+        self.model_name = self.backend.model_name
+        self.cache = cache
+        self.max_concurrency = max(1, max_concurrency)
+        self.batch_size = max(1, batch_size)
+        self.budget = budget or PromptBudget(self.model_name)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+        self.refill_rounds = max(0, refill_rounds)
+        self.scheduler = scheduler
+        self.session_id = session_id
+        self.priority = priority
+
+        # Question type -> generator method / prompt builder. New question types only need entries here.
+        self.question_generators = {
+            "multiple_choice": self._generate_multiple_choice,
+            "true_false": self._generate_true_false,
+        }
+        self.prompt_builders = {
+            "multiple_choice": self._multiple_choice_prompt,
+            "true_false": self._true_false_prompt,
+        }
     
-    def generate_quiz(self, text_content, num_mcq=5, num_tf=5, difficulty="Medium"):
+    def generate_quiz(self, text_content, num_mcq=5, num_tf=5, difficulty="Medium", use_cache=True, existing_quiz=None):
         """
         Generate quiz questions from text content
         
@@ -17,29 +79,368 @@ class QuizGenerator:
             num_mcq (int): Number of multiple choice questions
             num_tf (int): Number of true/false questions
             difficulty (str): Difficulty level (Easy, Medium, Hard)
+            use_cache (bool): Set to False to skip the cache lookup and force a fresh quiz
+            existing_quiz (dict): Earlier quiz of the same text to top up; its questions are kept
+                (trimmed to the new counts) and only the missing ones are requested
+        
+        Returns:
+            dict: Generated quiz data with multiple choice and true/false questions. When some
+            requests failed, metadata["shortfall"] maps question type -> missing count and
+            metadata["errors"] lists the failures. metadata["stats"] holds stage timings and counters.
+        """
+        with metrics.collect() as stats:
+            started = time.perf_counter()
+            quiz = self._generate_quiz(text_content, num_mcq, num_tf, difficulty, use_cache, existing_quiz)
+            return self._attach_stats(quiz, stats, started)
+    
+    def _generate_quiz(self, text_content, num_mcq, num_tf, difficulty, use_cache, existing_quiz):
+        counts = {"multiple_choice": num_mcq, "true_false": num_tf}
+        # A top-up keeps the existing questions, so a cached quiz must not replace them
+        cache_key, cached = self._cache_lookup(text_content, counts, difficulty, use_cache and existing_quiz is None)
+        if cached is not None:
+            return cached
+        
+        results, seen = self._seed_results(counts, existing_quiz)
+        errors = []
+        missing = self._missing_counts(results, counts)
+        
+        # The first round asks for everything; later rounds re-request only what is still missing
+        for _ in range(1 + self.refill_rounds):
+            jobs = self._plan_batches(text_content, missing)
+            if not jobs:
+                break
+            
+            # Send every batch of every question type at the same time
+            outputs, round_errors = self._run_batches(jobs, difficulty, self._exclusions(results))
+            errors.extend(round_errors)
+            missing = self._merge_batches(results, seen, jobs, outputs, counts)
+            if not any(missing.values()) or self.circuit_breaker.is_open:
+                break
+        
+        return self._finish_quiz(results, counts, difficulty, text_content, errors, cache_key)
+    
+    def stream_quiz(self, text_content, num_mcq=5, num_tf=5, difficulty="Medium", use_cache=True, existing_quiz=None):
+        """
+        Generate a quiz, yielding each question as soon as the model finishes writing it
+        
+        Args:
+            text_content (str): The processed text content
+            num_mcq (int): Number of multiple choice questions
+            num_tf (int): Number of true/false questions
+            difficulty (str): Difficulty level (Easy, Medium, Hard)
+            use_cache (bool): Set to False to skip the cache lookup and force a fresh quiz
+            existing_quiz (dict): Earlier quiz of the same text to top up (see generate_quiz)
+        
+        Returns:
+            QuizStream: Iterable (sync or async) of (question_type, question) pairs, kept
+            questions of a top-up first; its quiz attribute holds the generate_quiz-shaped
+            result once iteration finishes
+        """
+        counts = {"multiple_choice": num_mcq, "true_false": num_tf}
+        return QuizStream(self, text_content, counts, difficulty, use_cache, existing_quiz)
+    
+    async def generate_quiz_async(self, text_content, num_mcq=5, num_tf=5, difficulty="Medium", use_cache=True,
+                                  existing_quiz=None):
+        """
+        Async variant of generate_quiz for callers that already run an event loop
+        
+        Args:
+            text_content (str): The processed text content
+            num_mcq (int): Number of multiple choice questions
+            num_tf (int): Number of true/false questions
+            difficulty (str): Difficulty level (Easy, Medium, Hard)
+            use_cache (bool): Set to False to skip the cache lookup and force a fresh quiz
+            existing_quiz (dict): Earlier quiz of the same text to top up (see generate_quiz)
         
         Returns:
             dict: Generated quiz data with multiple choice and true/false questions
         """
-        # Generate multiple choice questions
-        mcq_questions = self._generate_multiple_choice(text_content, num_mcq, difficulty)
+        with metrics.collect() as stats:
+            started = time.perf_counter()
+            quiz = await self._generate_quiz_async(text_content, num_mcq, num_tf, difficulty, use_cache, existing_quiz)
+            return self._attach_stats(quiz, stats, started)
+    
+    async def _generate_quiz_async(self, text_content, num_mcq, num_tf, difficulty, use_cache, existing_quiz):
+        counts = {"multiple_choice": num_mcq, "true_false": num_tf}
+        cache_key, cached = self._cache_lookup(text_content, counts, difficulty, use_cache and existing_quiz is None)
+        if cached is not None:
+            return cached
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
         
-        # Generate true/false questions
-        tf_questions = self._generate_true_false(text_content, num_tf, difficulty)
+        async def run(question_type, source_text, num_questions, exclude):
+            async with semaphore:
+                # The Gemini client is blocking, so each call gets its own worker thread
+                return await asyncio.to_thread(
+                    self.question_generators[question_type], source_text, num_questions, difficulty, exclude
+                )
         
+        results, seen = self._seed_results(counts, existing_quiz)
+        errors = []
+        missing = self._missing_counts(results, counts)
+        
+        for _ in range(1 + self.refill_rounds):
+            jobs = self._plan_batches(text_content, missing)
+            if not jobs:
+                break
+            
+            exclusions = self._exclusions(results)
+            outputs = []
+            runs = (run(question_type, source_text, num, exclusions[question_type]) for question_type, source_text, num in jobs)
+            for output in await asyncio.gather(*runs, return_exceptions=True):
+                if isinstance(output, Exception):
+                    errors.append(output)
+                    output = []
+                outputs.append(output)
+            missing = self._merge_batches(results, seen, jobs, outputs, counts)
+            if not any(missing.values()) or self.circuit_breaker.is_open:
+                break
+        
+        return self._finish_quiz(results, counts, difficulty, text_content, errors, cache_key)
+    
+    def _cache_lookup(self, text_content, counts, difficulty, use_cache):
+        """
+        Look the request up in the quiz cache
+        
+        Returns:
+            tuple: (cache key or None, cached quiz or None)
+        """
+        if self.cache is None:
+            return None, None
+        
+        with metrics.stage("cache_lookup"):
+            cache_key = self.cache.make_key(text_content, counts, difficulty, self.model_name, PROMPT_VERSION)
+            # A bypassed lookup still refreshes the entry once the new quiz is stored
+            cached = self.cache.get(cache_key) if use_cache else None
+        metrics.count("cache_hits" if cached is not None else "cache_misses")
+        return cache_key, cached
+    
+    def _cache_store(self, cache_key, quiz):
+        """Store a freshly generated quiz under cache_key"""
+        if self.cache is not None and cache_key is not None:
+            self.cache.set(cache_key, quiz)
+    
+    @staticmethod
+    def _attach_stats(quiz, stats, started):
+        """Record the total wall time and put this run's stats into the quiz metadata"""
+        metrics.record_time("total", time.perf_counter() - started)
+        quiz["metadata"]["stats"] = stats.as_dict()
+        return quiz
+    
+    def _seed_results(self, counts, existing_quiz):
+        """
+        Start a quiz from the questions of an existing one, trimmed to the requested counts
+        
+        Returns:
+            tuple: (question type -> kept questions, keys of the kept questions)
+        """
+        results = {
+            question_type: list((existing_quiz or {}).get(question_type, []))[:max(0, num)]
+            for question_type, num in counts.items()
+        }
+        seen = {
+            (question_type, self._question_key(question))
+            for question_type, questions in results.items()
+            for question in questions
+        }
+        if existing_quiz is not None:
+            metrics.count("reused_questions", sum(len(questions) for questions in results.values()))
+        return results, seen
+    
+    @staticmethod
+    def _exclusions(results):
+        """Question type -> texts of the questions collected so far, for new prompts to avoid"""
         return {
-            "multiple_choice": mcq_questions,
-            "true_false": tf_questions,
-            "metadata": {
-                "difficulty": difficulty,
-                "total_questions": num_mcq + num_tf,
-                "source_length": len(text_content)
-            }
+            question_type: [str(question.get("question", "")) for question in questions]
+            for question_type, questions in results.items()
+        }
+    
+    def _plan_batches(self, text_content, counts):
+        """
+        Split the requested counts into batches, each with its own source window
+        
+        Args:
+            text_content (str): The processed text content
+            counts (dict): Question type -> number of questions
+        
+        Returns:
+            list: (question_type, source_text, num_questions) tuples
+        """
+        sizes = []
+        for question_type, num in counts.items():
+            full_batches, remainder = divmod(max(0, num), self.batch_size)
+            sizes.extend((question_type, self.batch_size) for _ in range(full_batches))
+            if remainder:
+                sizes.append((question_type, remainder))
+        
+        # Each batch gets as much source text as its question count warrants
+        budgets = [self.budget.context_chars(question_type, num) for question_type, num in sizes]
+        windows = self._source_windows(text_content, budgets)
+        
+        return [
+            (question_type, window, num)
+            for (question_type, num), window in zip(sizes, windows)
+        ]
+    
+    def _source_windows(self, text_content, budgets):
+        """
+        Build one source context per batch from the most informative, diverse chunks
+        
+        Args:
+            text_content (str): The processed text content
+            budgets (list): Character budget of each batch's context
+        
+        Returns:
+            list: One context string per budget
+        """
+        if not budgets or len(text_content) <= min(budgets):
+            return [text_content] * len(budgets)
+        
+        # The index is memoized per document, so repeat quizzes skip chunking and scoring.
+        # Batches are interleaved by type, so every question type sees every part of the document.
+        index = build_index(text_content)
+        return index.select_groups(budgets)
+    
+    def _run_batches(self, jobs, difficulty, exclusions=None):
+        """
+        Run every planned batch in parallel
+        
+        Args:
+            jobs (list): Output of _plan_batches
+            difficulty (str): Difficulty level
+            exclusions (dict): Question type -> existing question texts the new questions must not repeat
+        
+        Returns:
+            tuple: (generated questions for each job in job order, exceptions of failed jobs)
+        """
+        outputs, errors = [], []
+        if not jobs:
+            return outputs, errors
+        
+        exclusions = exclusions or {}
+        stats = metrics.current_stats()
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(jobs))) as executor:
+            futures = [
+                executor.submit(
+                    metrics.run_with, stats, self.question_generators[question_type], source_text, num, difficulty,
+                    exclusions.get(question_type)
+                )
+                for question_type, source_text, num in jobs
+            ]
+            # A failed batch costs only its own questions, not the whole quiz
+            for future in futures:
+                try:
+                    outputs.append(future.result())
+                except Exception as e:
+                    outputs.append([])
+                    errors.append(e)
+        
+        return outputs, errors
+    
+    def _merge_batches(self, results, seen, jobs, outputs, counts):
+        """
+        Merge batch results into results per question type, dropping duplicate questions
+        
+        Args:
+            results (dict): Question type -> questions collected so far (updated in place)
+            seen (set): Keys of questions already collected (updated in place)
+            jobs (list): Output of _plan_batches
+            outputs (list): Generated questions for each job
+            counts (dict): Question type -> number of questions requested
+        
+        Returns:
+            dict: Question type -> number of questions still missing
+        """
+        for (question_type, _, _), questions in zip(jobs, outputs):
+            for question in questions:
+                key = (question_type, self._question_key(question))
+                if key in seen or len(results[question_type]) >= counts[question_type]:
+                    continue
+                seen.add(key)
+                results[question_type].append(question)
+        
+        return self._missing_counts(results, counts)
+    
+    @staticmethod
+    def _missing_counts(results, counts):
+        return {question_type: max(0, counts[question_type] - len(results[question_type])) for question_type in counts}
+    
+    def _finish_quiz(self, results, counts, difficulty, text_content, errors, cache_key):
+        """
+        Build the final quiz, reporting any shortfall instead of failing the whole quiz
+        
+        Raises:
+            Exception: When every request failed and no question was generated
+        """
+        if errors and not any(results.values()):
+            # Breaker rejections are a symptom; report the failure that opened the breaker
+            raise next((error for error in errors if not self._is_circuit_open(error)), errors[0])
+        
+        quiz = self._build_quiz(results, counts, difficulty, text_content)
+        shortfall = {question_type: missing for question_type, missing in self._missing_counts(results, counts).items() if missing}
+        if shortfall:
+            quiz["metadata"]["shortfall"] = shortfall
+        if errors:
+            quiz["metadata"]["errors"] = [str(error) for error in errors]
+        
+        # Incomplete quizzes are not cached so the next request tries again
+        if not shortfall:
+            self._cache_store(cache_key, quiz)
+        return quiz
+    
+    @staticmethod
+    def _is_circuit_open(error):
+        """Whether a job failed only because the circuit breaker rejected it"""
+        return isinstance(error, CircuitOpenError) or isinstance(error.__cause__, CircuitOpenError)
+    
+    @staticmethod
+    def _question_key(question):
+        """Normalized question text used for de-duplication"""
+        text = str(question.get("question", "")).lower()
+        return " ".join("".join(c if c.isalnum() else " " for c in text).split())
+    
+    def _build_quiz(self, results, counts, difficulty, text_content):
+        """Assemble the quiz dict returned by generate_quiz"""
+        quiz = dict(results)
+        quiz["metadata"] = {
+            "difficulty": difficulty,
+            "total_questions": sum(counts.values()),
+            "source_length": len(text_content)
         }
+        return quiz
     
-    def _generate_multiple_choice(self, text_content, num_questions, difficulty):
+    def _generate_multiple_choice(self, text_content, num_questions, difficulty, exclude=None):
         """Generate multiple choice questions"""
-        prompt = f"""
+        return self._generate_questions("multiple_choice", text_content, num_questions, difficulty, exclude)
+    
+    def _generate_questions(self, question_type, text_content, num_questions, difficulty, exclude=None):
+        """Generate questions of any registered type"""
+        with metrics.stage("prompt_build"):
+            prompt = self.prompt_builders[question_type](text_content, num_questions, difficulty, exclude)
+        
+        questions = []
+        try:
+            for question in self._stream_questions(prompt, question_type, num_questions):
+                questions.append(question)
+        except Exception as e:
+            # Keep what arrived before a mid-stream failure; the refill round asks for the rest
+            if not questions:
+                label = QUESTION_TYPE_LABELS.get(question_type, question_type)
+                raise Exception(f"Failed to generate {label} questions: {str(e)}") from e
+        return questions
+    
+    @staticmethod
+    def _exclusion_requirement(exclude):
+        """Prompt requirement listing questions the quiz already has (empty when there are none)"""
+        if not exclude:
+            return ""
+        # The most recent questions are the likeliest near-duplicates; older ones are left out to bound the prompt
+        listed = "\n".join(f"          * {question[:MAX_EXCLUDED_CHARS]}" for question in exclude[-MAX_EXCLUDED_QUESTIONS:])
+        return f"\n        - The quiz already has these questions; do not repeat or rephrase any of them:\n{listed}"
+    
+    def _multiple_choice_prompt(self, text_content, num_questions, difficulty, exclude=None):
+        """Build the multiple choice prompt"""
+        return f"""
         Based on the following text content, generate exactly {num_questions} multiple choice questions at {difficulty} difficulty level.
         
         Requirements:
@@ -48,10 +449,10 @@ class QuizGenerator:
         - Include an explanation for why the correct answer is right
         - Questions should test comprehension, not just memorization
         - Avoid questions that can be answered without reading the text
-        - Make sure all questions are directly answerable from the provided content
+        - Make sure all questions are directly answerable from the provided content{self._exclusion_requirement(exclude)}
         
         Text content:
-        {text_content[:4000]}  # Limit content to avoid token limits
+        {text_content[:self.budget.context_chars("multiple_choice", num_questions)]}
         
         Response format (JSON only):
         {{
@@ -65,48 +466,14 @@ class QuizGenerator:
             ]
         }}
         """
-        
-        try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=2000,
-                )
-            )
-            
-            # Extract and clean JSON from response
-            response_text = response.text.strip()
-            
-            # Try to find and extract JSON
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            
-            if json_start != -1 and json_end != -1:
-                json_text = response_text[json_start:json_end]
-                
-                # Clean up common JSON formatting issues
-                json_text = json_text.replace('\n', ' ')
-                json_text = json_text.replace('\t', ' ')
-                # Remove multiple spaces
-                import re
-                json_text = re.sub(r'\s+', ' ', json_text)
-                
-                try:
-                    result = json.loads(json_text)
-                    return result.get("questions", [])
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, try to extract questions manually
-                    return self._extract_questions_manually(response_text, "mcq")
-            else:
-                return self._extract_questions_manually(response_text, "mcq")
-            
-        except Exception as e:
-            raise Exception(f"Failed to generate multiple choice questions: {str(e)}")
     
-    def _generate_true_false(self, text_content, num_questions, difficulty):
+    def _generate_true_false(self, text_content, num_questions, difficulty, exclude=None):
         """Generate true/false questions"""
-        prompt = f"""
+        return self._generate_questions("true_false", text_content, num_questions, difficulty, exclude)
+    
+    def _true_false_prompt(self, text_content, num_questions, difficulty, exclude=None):
+        """Build the true/false prompt"""
+        return f"""
         Based on the following text content, generate exactly {num_questions} true/false questions at {difficulty} difficulty level.
         
         Requirements:
@@ -115,10 +482,10 @@ class QuizGenerator:
         - Mix of true and false answers (roughly 50/50)
         - Questions should test understanding, not just factual recall
         - Avoid ambiguous statements
-        - Make sure all questions are directly answerable from the provided content
+        - Make sure all questions are directly answerable from the provided content{self._exclusion_requirement(exclude)}
         
         Text content:
-        {text_content[:4000]}  # Limit content to avoid token limits
+        {text_content[:self.budget.context_chars("true_false", num_questions)]}
         
         Response format (JSON only):
         {{
@@ -131,44 +498,127 @@ class QuizGenerator:
             ]
         }}
         """
+    
+    def _stream_questions(self, prompt, question_type, num_questions):
+        """
+        Request questions with retries and yield each one as soon as it is complete
+        
+        Failed attempts are retried with backoff while nothing has been yielded yet; once
+        questions have been handed out, a failure is raised so the caller keeps them and
+        re-requests only the missing ones.
         
+        Args:
+            prompt (str): Full prompt text
+            question_type (str): Question type key, selects the response schema
+            num_questions (int): Number of questions requested
+        
+        Yields:
+            dict: Question objects in the order the model writes them
+        """
+        started = time.monotonic()
+        attempt = 0
+        last_error = None
+        while True:
+            attempt += 1
+            try:
+                self.circuit_breaker.before_call()
+            except CircuitOpenError:
+                # A retry cut short by the breaker still failed for the reason of its last attempt
+                if last_error is None:
+                    raise
+                raise last_error
+            emitted = 0
+            try:
+                for question in self._request_questions(prompt, question_type, num_questions):
+                    emitted += 1
+                    yield question
+            except Exception as e:
+                # Errors tied to this request (a rejected prompt) must not pause every session sharing the breaker
+                if self.retry_policy.is_retryable(e):
+                    self.circuit_breaker.record_failure()
+                else:
+                    self.circuit_breaker.release()
+                delay = None if emitted else self.retry_policy.next_delay(e, attempt, started)
+                if delay is None:
+                    raise
+                last_error = e
+                metrics.count("retries")
+                time.sleep(delay)
+            else:
+                self.circuit_breaker.record_success()
+                return
+    
+    def _request_questions(self, prompt, question_type, num_questions):
+        """
+        Send one request to the backend and yield each question as soon as it is complete
+        
+        Args:
+            prompt (str): Full prompt text
+            question_type (str): Question type key, selects the response schema
+            num_questions (int): Number of questions requested
+        
+        Yields:
+            dict: Question objects in the order the model writes them
+        """
+        max_output_tokens = self.budget.output_tokens(question_type, num_questions)
+        if self.scheduler is not None:
+            # Charge the worst case up front so the tokens-per-minute quota is never overrun
+            with metrics.stage("rate_limit_wait"):
+                self.scheduler.acquire(estimate_tokens(prompt) + max_output_tokens, self.session_id, self.priority)
+        
+        metrics.count("requests")
+        response = iter(self.backend.stream_text(
+            prompt, question_type, num_questions, max_output_tokens, timeout=self.retry_policy.attempt_timeout
+        ))
+        
+        parser = IncrementalQuestionParser(question_type)
+        parts = []
+        emitted = 0
+        # Time spent waiting on the model and in the parser, excluding the consumer's time between yields
+        model_time = parse_time = 0.0
         try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=genai.GenerationConfig(
-                    temperature=0.7,
-                    max_output_tokens=2000,
-                )
-            )
-            
-            # Extract and clean JSON from response
-            response_text = response.text.strip()
-            
-            # Try to find and extract JSON
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            
-            if json_start != -1 and json_end != -1:
-                json_text = response_text[json_start:json_end]
+            while True:
+                started = time.perf_counter()
+                text = next(response, None)
+                model_time += time.perf_counter() - started
+                if text is None:
+                    break
                 
-                # Clean up common JSON formatting issues
-                json_text = json_text.replace('\n', ' ')
-                json_text = json_text.replace('\t', ' ')
-                # Remove multiple spaces
-                import re
-                json_text = re.sub(r'\s+', ' ', json_text)
-                
-                try:
-                    result = json.loads(json_text)
-                    return result.get("questions", [])
-                except json.JSONDecodeError:
-                    # If JSON parsing fails, try to extract questions manually
-                    return self._extract_questions_manually(response_text, "tf")
-            else:
-                return self._extract_questions_manually(response_text, "tf")
-            
-        except Exception as e:
-            raise Exception(f"Failed to generate true/false questions: {str(e)}")
+                parts.append(text)
+                started = time.perf_counter()
+                questions = parser.feed(text)
+                parse_time += time.perf_counter() - started
+                for question in questions:
+                    emitted += 1
+                    yield question
+        finally:
+            metrics.record_time("model_latency", model_time)
+            metrics.record_time("parse", parse_time)
+            if parser.malformed:
+                metrics.count("malformed_objects", parser.malformed)
+        
+        if not emitted:
+            # Nothing decoded incrementally (e.g. the model ignored JSON mode); recover from the full text
+            metrics.count("fallbacks")
+            with metrics.stage("fallback"):
+                questions = self._parse_response_text("".join(parts).strip(), question_type)
+            yield from questions
+    
+    def _parse_response_text(self, response_text, question_type):
+        """Parse a complete response, falling back to manual extraction when it is not valid JSON"""
+        questions = decode_response(response_text, question_type)
+        if questions is None:
+            # If JSON parsing fails, try to extract questions manually
+            fallback_type = "mcq" if question_type == "multiple_choice" else "tf"
+            records = self._extract_questions_manually(response_text, fallback_type)
+            # The heuristics guess; records that do not validate are dropped so a refill round replaces them
+            questions = [
+                question for question in (validate_question(record, question_type) for record in records)
+                if question is not None
+            ]
+            if len(questions) < len(records):
+                metrics.count("malformed_objects", len(records) - len(questions))
+        return questions
     
     def validate_quiz_data(self, quiz_data):
         """Validate the generated quiz data structure"""
@@ -216,6 +666,9 @@ class QuizGenerator:
             
             for line in lines:
                 line = line.strip()
+                if line.startswith(JSON_FRAGMENT_PREFIXES):
+                    # Pieces of a broken JSON response are not prose questions
+                    continue
                 if line.startswith('Question') or line.endswith('?'):
                     if current_question and current_options:
                         questions.append({
@@ -246,6 +699,8 @@ class QuizGenerator:
             
             for line in lines:
                 line = line.strip()
+                if line.startswith(JSON_FRAGMENT_PREFIXES):
+                    continue
                 if line.endswith('?') or 'True' in line or 'False' in line:
                     if line:
                         questions.append({
@@ -255,3 +710,102 @@ class QuizGenerator:
                         })
         
         return questions[:5]  # Limit to 5 questions as fallback
+
+
+class QuizStream:
+    """Questions of one quiz, delivered as they arrive from concurrent model requests"""
+    
+    def __init__(self, generator, text_content, counts, difficulty, use_cache=True, existing_quiz=None):
+        self.generator = generator
+        self.text_content = text_content
+        self.counts = counts
+        self.difficulty = difficulty
+        self.use_cache = use_cache
+        self.existing_quiz = existing_quiz
+        self.quiz = None
+        self.stats = metrics.QuizStats()
+    
+    def __iter__(self):
+        generator = self.generator
+        # This generator runs in its consumer's context, so stats are bound explicitly per call
+        started = time.perf_counter()
+        cache_key, cached = metrics.run_with(
+            self.stats, generator._cache_lookup, self.text_content, self.counts, self.difficulty,
+            self.use_cache and self.existing_quiz is None
+        )
+        if cached is not None:
+            self.quiz = metrics.run_with(self.stats, generator._attach_stats, cached, self.stats, started)
+            for question_type in self.counts:
+                for question in cached.get(question_type, []):
+                    yield question_type, question
+            return
+        
+        results, seen = metrics.run_with(self.stats, generator._seed_results, self.counts, self.existing_quiz)
+        for question_type, questions in results.items():
+            for question in questions:
+                yield question_type, question
+        errors = []
+        events = queue.Queue()
+        
+        def run(question_type, source_text, num_questions, exclude):
+            # Every job ends with exactly one (question_type, None, exception or None) event
+            try:
+                with metrics.stage("prompt_build"):
+                    prompt = generator.prompt_builders[question_type](source_text, num_questions, self.difficulty, exclude)
+                for question in generator._stream_questions(prompt, question_type, num_questions):
+                    events.put((question_type, question, None))
+            except Exception as e:
+                label = QUESTION_TYPE_LABELS.get(question_type, question_type)
+                error = Exception(f"Failed to generate {label} questions: {str(e)}")
+                error.__cause__ = e
+                events.put((question_type, None, error))
+            else:
+                events.put((question_type, None, None))
+        
+        missing = generator._missing_counts(results, self.counts)
+        executor = ThreadPoolExecutor(max_workers=generator.max_concurrency)
+        try:
+            # The first round asks for everything; later rounds re-request only what is still missing
+            for _ in range(1 + generator.refill_rounds):
+                jobs = generator._plan_batches(self.text_content, missing)
+                if not jobs:
+                    break
+                exclusions = generator._exclusions(results)
+                for question_type, source_text, num in jobs:
+                    executor.submit(metrics.run_with, self.stats, run, question_type, source_text, num, exclusions[question_type])
+                
+                pending = len(jobs)
+                while pending:
+                    question_type, question, error = events.get()
+                    if question is None:
+                        pending -= 1
+                        if error is not None:
+                            errors.append(error)
+                        continue
+                    
+                    key = (question_type, generator._question_key(question))
+                    if key in seen or len(results[question_type]) >= self.counts[question_type]:
+                        continue
+                    seen.add(key)
+                    results[question_type].append(question)
+                    yield question_type, question
+                
+                missing = generator._missing_counts(results, self.counts)
+                if not any(missing.values()) or generator.circuit_breaker.is_open:
+                    break
+        finally:
+            # If the consumer stops early, do not wait for requests still in flight
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        quiz = generator._finish_quiz(results, self.counts, self.difficulty, self.text_content, errors, cache_key)
+        self.quiz = metrics.run_with(self.stats, generator._attach_stats, quiz, self.stats, started)
+    
+    async def __aiter__(self):
+        # Drive the blocking iterator from a worker thread so the event loop stays free
+        iterator = iter(self)
+        done = object()
+        while True:
+            item = await asyncio.to_thread(next, iterator, done)
+            if item is done:
+                return
+            yield item
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    hash TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS quizzes (
+    id INTEGER PRIMARY KEY,
+    quiz_hash TEXT NOT NULL UNIQUE,
+    document_hash TEXT NOT NULL REFERENCES documents(hash),
+    difficulty TEXT NOT NULL,
+    num_mcq INTEGER NOT NULL,
+    num_tf INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    quiz_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS quizzes_document ON quizzes(document_hash, created_at);
+CREATE INDEX IF NOT EXISTS quizzes_difficulty ON quizzes(difficulty, created_at);
+CREATE INDEX IF NOT EXISTS quizzes_created ON quizzes(created_at);
+"""
+
+
+class QuizStore:
+    """
+    Persistent SQLite store of processed documents and the quizzes generated from them
+
+    Unlike QuizCache, nothing is evicted: this is the history users reopen quizzes from.
+    Documents are keyed by a hash of their extracted text, so reopening a quiz restores
+    its source text without extracting the file again.
+    """
+
+    def __init__(self, path="quiz_store.sqlite3"):
+        """
+        Initialize the store, creating the database and its tables if needed
+
+        Args:
+            path (str): SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # One connection shared by every session; the lock serializes access to it
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+
+    @staticmethod
+    def document_hash(text_content):
+        """sha256 of a document's extracted text"""
+        return hashlib.sha256(text_content.encode("utf-8")).hexdigest()
+
+    def save_document(self, text_content, name):
+        """
+        Store a document's extracted text (a no-op if the same text is stored already)
+
+        Args:
+            text_content (str): The processed text content
+            name (str): Original file name
+
+        Returns:
+            str: Document hash
+        """
+        document_hash = self.document_hash(text_content)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO documents (hash, name, text, created_at) VALUES (?, ?, ?, ?)",
+                (document_hash, name, text_content, time.time())
+            )
+        return document_hash
+
+    def get_document(self, document_hash):
+        """
+        Return a stored document, or None if it is unknown
+
+        Args:
+            document_hash (str): Hash from save_document
+
+        Returns:
+            dict: hash, name, text and created_at of the document
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT hash, name, text, created_at FROM documents WHERE hash = ?", (document_hash,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def save_quiz(self, document_hash, quiz_data):
+        """
+        Store a quiz generated from a stored document (a no-op if the same quiz is stored already)
+
+        Args:
+            document_hash (str): Hash of the source document from save_document
+            quiz_data (dict): Quiz data as returned by QuizGenerator
+
+        Returns:
+            int: Id of the stored quiz
+        """
+        # Stage timings differ on every run, so they are neither stored nor part of the identity
+        metadata = {key: value for key, value in quiz_data["metadata"].items() if key != "stats"}
+        quiz_json = json.dumps(dict(quiz_data, metadata=metadata), sort_keys=True)
+        identity = json.dumps({
+            "document": document_hash,
+            "difficulty": metadata.get("difficulty", ""),
+            "multiple_choice": quiz_data["multiple_choice"],
+            "true_false": quiz_data["true_false"],
+        }, sort_keys=True)
+        quiz_hash = hashlib.sha256(identity.encode("utf-8")).hexdigest()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO quizzes (quiz_hash, document_hash, difficulty, num_mcq, num_tf, created_at, quiz_json) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    quiz_hash, document_hash, metadata.get("difficulty", ""),
+                    len(quiz_data["multiple_choice"]), len(quiz_data["true_false"]), time.time(), quiz_json
+                )
+            )
+            row = self._connection.execute("SELECT id FROM quizzes WHERE quiz_hash = ?", (quiz_hash,)).fetchone()
+        return row["id"]
+
+    def get_quiz(self, quiz_id):
+        """
+        Return a stored quiz and the hash of its document, or None if it is unknown
+
+        Args:
+            quiz_id (int): Id from save_quiz or list_quizzes
+
+        Returns:
+            tuple: (quiz_data, document_hash)
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT quiz_json, document_hash FROM quizzes WHERE id = ?", (quiz_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row["quiz_json"]), row["document_hash"]
+
+    def list_quizzes(self, document_hash=None, difficulty=None, since=None, until=None, limit=50):
+        """
+        Summaries of stored quizzes, newest first, without loading the quizzes themselves
+
+        Args:
+            document_hash (str): Only quizzes of this document
+            difficulty (str): Only quizzes of this difficulty
+            since (float): Only quizzes created at or after this Unix time
+            until (float): Only quizzes created before this Unix time
+            limit (int): Maximum number of summaries
+
+        Returns:
+            list: Dicts with id, document_hash, document_name, difficulty, num_mcq, num_tf and created_at
+        """
+        conditions, params = [], []
+        for condition, value in (
+            ("q.document_hash = ?", document_hash),
+            ("q.difficulty = ?", difficulty),
+            ("q.created_at >= ?", since),
+            ("q.created_at < ?", until),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT q.id, q.document_hash, d.name AS document_name, q.difficulty, q.num_mcq, q.num_tf, q.created_at "
+                f"FROM quizzes q JOIN documents d ON d.hash = q.document_hash {where} "
+                "ORDER BY q.created_at DESC LIMIT ?",
+                (*params, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete_quiz(self, quiz_id):
+        """Remove a stored quiz (its document is kept)"""
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM quizzes WHERE id = ?", (quiz_id,))
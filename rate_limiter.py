@@ -0,0 +1,122 @@
+import collections
+import itertools
+import threading
+import time
+
+
+class SlidingWindow:
+    """
+    Log of admissions over the last minute, so no 60 second window exceeds the quota
+
+    A token bucket that starts full and refills at the per-minute rate admits up to
+    twice the quota in its first minute; counting what was actually admitted in the
+    trailing window cannot.
+    """
+
+    def __init__(self, per_minute, window=60.0):
+        """
+        Initialize an empty window
+
+        Args:
+            per_minute (float): Maximum units admitted in any window
+            window (float): Window length in seconds
+        """
+        self.limit = per_minute
+        self.window = window
+        self.admitted = collections.deque()
+        self.total = 0
+
+    def _expire(self, now):
+        while self.admitted and self.admitted[0][0] <= now - self.window:
+            self.total -= self.admitted.popleft()[1]
+
+    def wait_time(self, amount, now):
+        """Seconds until amount units fit in the window (0 if they fit now)"""
+        self._expire(now)
+        # A request larger than the whole quota could never fit; let it through on an empty window
+        excess = self.total + min(amount, self.limit) - self.limit
+        if excess <= 0:
+            return 0.0
+        freed = 0
+        for admitted_at, admitted in self.admitted:
+            freed += admitted
+            if freed >= excess:
+                return admitted_at + self.window - now
+        return self.window
+
+    def consume(self, amount, now):
+        self.admitted.append((now, amount))
+        self.total += amount
+
+
+class RequestScheduler:
+    """
+    Process-wide admission control for model requests
+
+    Requests wait until both the requests-per-minute and tokens-per-minute windows
+    can cover them. Waiting requests are served by priority (lower first), then
+    fairly across sessions: the session that has been served least since it started
+    waiting goes next, so one large quiz cannot starve everyone else.
+    """
+
+    def __init__(self, requests_per_minute=15, tokens_per_minute=1_000_000):
+        """
+        Initialize the scheduler
+
+        Args:
+            requests_per_minute (int): Requests-per-minute quota of the API key
+            tokens_per_minute (int): Tokens-per-minute quota of the API key
+        """
+        self.requests = SlidingWindow(requests_per_minute)
+        self.tokens = SlidingWindow(tokens_per_minute)
+        self._condition = threading.Condition()
+        self._waiting = []
+        self._served = {}
+        self._sequence = itertools.count()
+
+    def acquire(self, tokens, session_id="default", priority=0, timeout=None):
+        """
+        Block until a request of the given token cost may be sent
+
+        Args:
+            tokens (int): Estimated tokens of the request (prompt plus response)
+            session_id (str): Caller identity used for fair sharing
+            priority (int): Lower values are served first
+            timeout (float): Maximum seconds to wait, None to wait indefinitely
+
+        Raises:
+            TimeoutError: If the request could not be admitted within timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            if session_id not in self._served:
+                # Newcomers start level with the sessions already waiting instead of jumping ahead
+                self._served[session_id] = min(self._served.values(), default=0)
+            entry = (priority, next(self._sequence), session_id)
+            self._waiting.append(entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._next_entry() is entry:
+                        delay = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+                        if delay <= 0:
+                            self.requests.consume(1, now)
+                            self.tokens.consume(tokens, now)
+                            self._served[session_id] += 1
+                            return
+                    else:
+                        delay = None
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise TimeoutError("Timed out waiting for the request rate limit")
+                        delay = remaining if delay is None else min(delay, remaining)
+                    self._condition.wait(delay)
+            finally:
+                self._waiting.remove(entry)
+                if not any(waiting[2] == session_id for waiting in self._waiting):
+                    del self._served[session_id]
+                self._condition.notify_all()
+
+    def _next_entry(self):
+        return min(self._waiting, key=lambda entry: (entry[0], self._served[entry[2]], entry[1]))
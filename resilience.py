@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+from google.api_core import exceptions as api_exceptions
+
+# Errors worth retrying: rate limits, overload and transient network/server failures
+RETRYABLE_ERRORS = (
+    api_exceptions.TooManyRequests,
+    api_exceptions.ResourceExhausted,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.InternalServerError,
+    api_exceptions.DeadlineExceeded,
+    api_exceptions.GatewayTimeout,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the model while the circuit breaker is open"""
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, bounded by an overall deadline"""
+
+    def __init__(self, max_attempts=4, base_delay=1.0, max_delay=20.0, attempt_timeout=60.0, deadline=120.0):
+        """
+        Initialize the policy
+
+        Args:
+            max_attempts (int): Attempts per request, including the first
+            base_delay (float): Backoff before the first retry, in seconds
+            max_delay (float): Upper bound on a single backoff, in seconds
+            attempt_timeout (float): Timeout passed to each model call, in seconds
+            deadline (float): Total time allowed for a request across all attempts, in seconds
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
+
+    def is_retryable(self, error):
+        return isinstance(error, RETRYABLE_ERRORS)
+
+    def backoff(self, attempt):
+        """Full-jitter delay before retry number attempt (1-based)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def next_delay(self, error, attempt, started):
+        """
+        Decide whether to retry after a failed attempt
+
+        Args:
+            error (Exception): The failure
+            attempt (int): Number of attempts made so far
+            started (float): time.monotonic() when the first attempt began
+
+        Returns:
+            float: Seconds to wait before retrying, or None to give up
+        """
+        if attempt >= self.max_attempts or not self.is_retryable(error):
+            return None
+        delay = self.backoff(attempt)
+        if time.monotonic() - started + delay > self.deadline:
+            return None
+        return delay
+
+
+class CircuitBreaker:
+    """
+    Stop calling a failing backend for a while
+
+    After failure_threshold consecutive failures the breaker opens and calls fail fast
+    with CircuitOpenError. After reset_timeout seconds one trial call is let through
+    (half-open); its success closes the breaker, its failure opens it again. Only
+    transient errors should be recorded as failures; see RETRYABLE_ERRORS.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call must not go through"""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._trial_in_flight:
+                raise CircuitOpenError("Question generation is temporarily paused after repeated failures")
+            self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release(self):
+        """End a call whose error says nothing about backend health (e.g. a rejected prompt)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
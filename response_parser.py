@@ -0,0 +1,310 @@
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Response schemas for Gemini's JSON mode, one per question type
+QUESTION_SCHEMAS = {
+    "multiple_choice": {
+        "type": "object",
+        "properties": {
+            "questions": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "question": {"type": "string"},
+                        "options": {"type": "array", "items": {"type": "string"}},
+                        "correct_answer": {"type": "string"},
+                        "explanation": {"type": "string"},
+                    },
+                    "required": ["question", "options", "correct_answer", "explanation"],
+                },
+            }
+        },
+        "required": ["questions"],
+    },
+    "true_false": {
+        "type": "object",
+        "properties": {
+            "questions": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "question": {"type": "string"},
+                        "correct_answer": {"type": "boolean"},
+                        "explanation": {"type": "string"},
+                    },
+                    "required": ["question", "correct_answer", "explanation"],
+                },
+            }
+        },
+        "required": ["questions"],
+    },
+}
+
+
+# Markdown code fence around a JSON payload, e.g. ```json ... ```
+_FENCED_BLOCK = re.compile(r"```(?:json|JSON)?[^\S\n]*\n?(.*?)```", re.DOTALL)
+
+# Characters that matter to bracket matching; everything else is skipped in C
+_STRUCTURAL = re.compile(r'["\\{}\[\]]')
+
+# Answer letters models sometimes return instead of the option text
+_OPTION_LETTERS = {"A": 0, "B": 1, "C": 2, "D": 3}
+# Multiple choice questions always have exactly this many options (exports have columns A-D)
+NUM_OPTIONS = len(_OPTION_LETTERS)
+
+
+def _loads(text):
+    """Decode JSON with orjson when installed; raises ValueError on invalid input"""
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    # strict=False accepts raw newlines and tabs inside strings, which models often emit
+    return json.loads(text, strict=False)
+
+
+def _multiple_choice_record(value):
+    """A validated multiple choice question dict, or None if value is not one"""
+    question, options = value.get("question"), value.get("options")
+    if not isinstance(question, str) or not question.strip() or not isinstance(options, list) or len(options) != NUM_OPTIONS:
+        return None
+    options = [str(option) for option in options]
+    answer = value.get("correct_answer")
+    if isinstance(answer, str) and answer not in options:
+        # Accept "B" or "B." for the second option
+        index = _OPTION_LETTERS.get(answer.strip().rstrip(".)").upper())
+        answer = options[index] if index is not None else None
+    if answer not in options:
+        return None
+    record = {"question": question, "options": options, "correct_answer": answer}
+    if "explanation" in value:
+        record["explanation"] = str(value["explanation"])
+    return record
+
+
+def _true_false_record(value):
+    """A validated true/false question dict, or None if value is not one"""
+    question, answer = value.get("question"), value.get("correct_answer")
+    if not isinstance(question, str) or not question.strip():
+        return None
+    if isinstance(answer, str) and answer.strip().lower() in ("true", "false"):
+        answer = answer.strip().lower() == "true"
+    if not isinstance(answer, bool):
+        return None
+    record = {"question": question, "correct_answer": answer}
+    if "explanation" in value:
+        record["explanation"] = str(value["explanation"])
+    return record
+
+
+# Question type -> validator returning the canonical question dict or None
+QUESTION_VALIDATORS = {
+    "multiple_choice": _multiple_choice_record,
+    "true_false": _true_false_record,
+}
+
+
+def validate_question(value, question_type):
+    """Return value as a canonical question dict of question_type, or None if it does not fit"""
+    if not isinstance(value, dict):
+        return None
+    return QUESTION_VALIDATORS[question_type](value)
+
+
+def find_json(text, openers="{["):
+    """
+    Locate the JSON payload in a model response
+
+    A fenced code block wins; otherwise the first balanced value opened by one of
+    openers is taken, scanning string-aware so braces inside strings do not count. An
+    unbalanced value (e.g. a truncated response) yields everything from its opening bracket.
+
+    Args:
+        text (str): Full response text
+        openers (str): Opening brackets a candidate may start with
+
+    Returns:
+        str: Candidate JSON text, or None if the response has no such bracket at all
+    """
+    fenced = _FENCED_BLOCK.search(text)
+    if fenced is not None and fenced.group(1).lstrip()[:1] in ("{", "["):
+        text = fenced.group(1)
+
+    starts = [index for index in map(text.find, openers) if index != -1]
+    if not starts:
+        return None
+    start = min(starts)
+
+    depth = 0
+    in_string = False
+    escaped_index = -1
+    for match in _STRUCTURAL.finditer(text, start):
+        index = match.start()
+        if index == escaped_index:
+            continue
+        char = match.group()
+        if in_string:
+            if char == "\\":
+                escaped_index = index + 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{" or char == "[":
+            depth += 1
+        elif char == "}" or char == "]":
+            depth -= 1
+            if depth == 0:
+                return text[start:index + 1]
+    return text[start:]
+
+
+def decode_response(text, question_type):
+    """
+    Decode a complete response into validated questions in one pass
+
+    Args:
+        text (str): Full response text
+        question_type (str): Question type key
+
+    Returns:
+        list: Valid question dicts (invalid entries are dropped), or None when no JSON
+        payload could be decoded and the caller should fall back to text extraction
+    """
+    candidate = find_json(text)
+    questions = _decode_candidate(candidate, question_type)
+    if not questions:
+        # Prose like "Here are [20] questions: {...}" puts a bracket before the payload
+        object_candidate = find_json(text, "{")
+        if object_candidate is not None and object_candidate != candidate:
+            return _decode_candidate(object_candidate, question_type)
+    return questions
+
+
+def _decode_candidate(candidate, question_type):
+    """Valid questions of one candidate payload, or None if it is not a question payload"""
+    if candidate is None:
+        return None
+    try:
+        payload = _loads(candidate)
+    except ValueError:
+        return None
+
+    if isinstance(payload, dict):
+        payload = payload.get("questions", [])
+    # A list without a single object (e.g. "[20]") is not a question list
+    if not isinstance(payload, list) or (payload and not any(isinstance(value, dict) for value in payload)):
+        return None
+    questions = []
+    for value in payload:
+        record = validate_question(value, question_type)
+        if record is not None:
+            questions.append(record)
+    return questions
+
+
+def chunk_text(chunk):
+    """Text of a streamed response chunk, or "" for chunks without text (e.g. the final metadata chunk)"""
+    try:
+        return chunk.text
+    except (ValueError, AttributeError):
+        return ""
+
+
+class IncrementalQuestionParser:
+    """
+    Incremental JSON parser that emits question objects as soon as they are complete
+
+    Feed it response chunks in order. Objects that are elements of an array, either
+    the top-level array or an array directly inside the top-level object (as in
+    {"questions": [...]}), are decoded the moment their closing brace arrives.
+    Text outside the JSON value, such as markdown fences, is ignored. With a question
+    type, objects are validated and invalid ones counted as malformed.
+    """
+
+    def __init__(self, question_type=None):
+        self.question_type = question_type
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._capture_depth = None
+        self._pending = []
+        self.malformed = 0
+
+    def feed(self, chunk):
+        """
+        Consume the next piece of the response
+
+        Args:
+            chunk (str): Next piece of response text
+
+        Returns:
+            list: Question dicts completed by this chunk
+        """
+        completed = []
+        start = 0 if self._capture_depth is not None else None
+        stack = self._stack
+        # Position of a character escaped by a backslash; a trailing backslash escapes the next chunk's first
+        escaped_index = 0 if self._escaped else -1
+        self._escaped = False
+
+        # Only structural characters matter, so jump between them instead of visiting every character
+        for match in _STRUCTURAL.finditer(chunk):
+            i = match.start()
+            if i == escaped_index:
+                continue
+            char = match.group()
+            if self._in_string:
+                if char == "\\":
+                    escaped_index = i + 1
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                # Quotes in prose before the JSON starts are not strings
+                if stack:
+                    self._in_string = True
+            elif char == "{" or char == "[":
+                if char == "{" and self._capture_depth is None and stack in (["{", "["], ["["]):
+                    self._capture_depth = len(stack)
+                    start = i
+                stack.append(char)
+            elif char == "}" or char == "]":
+                if stack:
+                    stack.pop()
+                if char == "}" and self._capture_depth is not None and len(stack) == self._capture_depth:
+                    self._pending.append(chunk[start:i + 1])
+                    question = self._decode("".join(self._pending))
+                    if question is not None:
+                        completed.append(question)
+                    self._pending = []
+                    self._capture_depth = None
+                    start = None
+
+        if escaped_index == len(chunk):
+            self._escaped = True
+        if self._capture_depth is not None and start is not None:
+            self._pending.append(chunk[start:])
+        return completed
+
+    def _decode(self, text):
+        try:
+            value = _loads(text)
+        except ValueError:
+            self.malformed += 1
+            return None
+        if self.question_type is not None:
+            value = validate_question(value, self.question_type)
+        if not isinstance(value, dict):
+            self.malformed += 1
+            return None
+        return value
@@ -0,0 +1,284 @@
+import re
+import threading
+from array import array
+from collections import Counter, OrderedDict
+from typing import List, Optional, Sequence, Tuple
+import numpy as np
+
+# Lowercase word tokens of three or more characters
+_TOKEN = re.compile(r"[a-z][a-z0-9']{2,}")
+
+_STOPWORDS = frozenset("""
+    the and for are but not you all any can had her was one our out has him his how its may new now
+    old see two way who did get let say she too use that with have this will your from they been were
+    said each which their there would about could other into than then them these some what when
+    also more most such only over very just where while should those being because between through
+    during before after above below under again further once here both same than own does doing
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase content-word tokens used for indexing and queries"""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+def chunk_text(text: str, chunk_chars: int = 1500, overlap_chars: int = 200) -> List[str]:
+    """
+    Split text into overlapping chunks in document order
+
+    Cuts prefer a paragraph break, then a sentence end, then a space in the back half
+    of each window, so chunks rarely split a sentence.
+
+    Args:
+        text (str): Normalized document text
+        chunk_chars (int): Maximum chunk length in characters
+        overlap_chars (int): Characters shared between consecutive chunks
+
+    Returns:
+        List[str]: Chunk texts
+    """
+    chunks = []
+    start, length = 0, len(text)
+    while start < length:
+        end = min(length, start + chunk_chars)
+        if end < length:
+            floor = start + chunk_chars // 2
+            cut = text.rfind("\n\n", floor, end)
+            if cut == -1:
+                cut = text.rfind(". ", floor, end)
+                cut = cut + 1 if cut != -1 else text.rfind(" ", floor, end)
+            if cut != -1:
+                end = cut
+
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= length:
+            break
+
+        # Step back for the overlap, then forward to the next word boundary
+        next_start = max(end - overlap_chars, start + 1)
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 else next_start
+    return chunks
+
+
+class ChunkIndex:
+    """BM25 index over document chunks with diversity-aware chunk selection"""
+
+    def __init__(self, chunks: Sequence[str], max_features: int = 4096, k1: float = 1.5, b: float = 0.75):
+        """
+        Build the index
+
+        Args:
+            chunks (Sequence[str]): Chunk texts in document order
+            max_features (int): Vocabulary size (most frequent terms by document frequency)
+            k1 (float): BM25 term frequency saturation
+            b (float): BM25 length normalization
+        """
+        self.chunks = list(chunks)
+        counts = [Counter(tokenize(chunk)) for chunk in self.chunks]
+
+        document_frequency = Counter()
+        for chunk_counts in counts:
+            document_frequency.update(chunk_counts.keys())
+        vocabulary = [term for term, _ in document_frequency.most_common(max_features)]
+        self.vocabulary = {term: column for column, term in enumerate(vocabulary)}
+
+        # Sparse term frequencies as (row, column, count) triples in row order; compact arrays, not Python ints
+        rows, cols, values = array("i"), array("i"), array("f")
+        for row, chunk_counts in enumerate(counts):
+            for term, count in chunk_counts.items():
+                column = self.vocabulary.get(term)
+                if column is not None:
+                    rows.append(row)
+                    cols.append(column)
+                    values.append(count)
+        del counts
+        rows = np.frombuffer(rows, dtype=np.int32)
+        cols = np.frombuffer(cols, dtype=np.int32)
+        term_frequency = np.frombuffer(values, dtype=np.float32)
+
+        num_chunks = max(len(self.chunks), 1)
+        df = np.bincount(cols, minlength=len(vocabulary))
+        self.idf = np.log((num_chunks - df + 0.5) / (df + 0.5) + 1.0).astype(np.float32)
+
+        lengths = np.bincount(rows, weights=term_frequency, minlength=len(self.chunks))
+        average_length = max(float(lengths.mean()) if len(self.chunks) else 0.0, 1.0)
+        saturation = term_frequency + k1 * (1 - b + b * lengths[rows] / average_length)
+        # BM25 weight of every (chunk, term) pair present; a query score sums them over the query terms
+        weights = (term_frequency * (k1 + 1) / saturation * self.idf[cols]).astype(np.float32)
+        norms = np.sqrt(np.bincount(rows, weights=weights * weights, minlength=len(self.chunks)))
+        unit_weights = (weights / norms[rows]).astype(np.float32)
+
+        # CSR (chunk -> terms) and CSC (term -> chunks) views of the same sparse matrix
+        self._row_ptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=len(self.chunks)))))
+        self._row_cols = cols
+        self._row_unit = unit_weights
+        order = np.argsort(cols, kind="stable")
+        self._col_ptr = np.concatenate(([0], np.cumsum(df)))
+        self._col_rows = rows[order]
+        self._col_weights = weights[order]
+        self._col_unit = unit_weights[order]
+
+        # Salient terms recur across the document without being everywhere
+        salience = self.idf * np.log1p(np.bincount(cols, weights=term_frequency, minlength=len(vocabulary)))
+        self.informativeness = self._rescale(
+            np.bincount(rows, weights=weights * salience[cols], minlength=len(self.chunks))
+        )
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def size_bytes(self) -> int:
+        """Approximate memory held by the chunks and the sparse matrix, used to bound the memo"""
+        arrays = (self._row_ptr, self._row_cols, self._row_unit, self._col_ptr, self._col_rows, self._col_weights, self._col_unit)
+        return sum(len(chunk) for chunk in self.chunks) + sum(values.nbytes for values in arrays)
+
+    def search(self, query: str, top_k: int = 5) -> List[int]:
+        """
+        Rank chunks by BM25 score against a query
+
+        Args:
+            query (str): Free-text query
+            top_k (int): Number of chunk indices to return
+
+        Returns:
+            List[int]: Chunk indices, best first
+        """
+        scores = self._query_scores(query)
+        return [int(i) for i in np.argsort(-scores, kind="stable")[:top_k]]
+
+    def select(self, k: int, query: Optional[str] = None, diversity: float = 0.4) -> List[int]:
+        """
+        Pick k chunks that are informative (or relevant to query) and unlike each other
+
+        Uses maximal marginal relevance: each step takes the chunk with the best mix of
+        relevance and dissimilarity to the chunks already chosen.
+
+        Args:
+            k (int): Number of chunks to pick
+            query (str): Optional query; without one, chunks are ranked by informativeness
+            diversity (float): 0 ranks by relevance only, 1 by novelty only
+
+        Returns:
+            List[int]: Chunk indices in selection order
+        """
+        k = min(k, len(self.chunks))
+        if k <= 0:
+            return []
+
+        relevance = self.informativeness if query is None else self._rescale(self._query_scores(query))
+        max_similarity = np.zeros(len(self.chunks), dtype=np.float32)
+        available = np.ones(len(self.chunks), dtype=bool)
+        selected = []
+        for _ in range(k):
+            scores = np.where(available, (1 - diversity) * relevance - diversity * max_similarity, -np.inf)
+            best = int(np.argmax(scores))
+            selected.append(best)
+            available[best] = False
+            np.maximum(max_similarity, self._similarities(best), out=max_similarity)
+        return selected
+
+    def select_groups(self, budgets: Sequence[int], query: Optional[str] = None) -> List[str]:
+        """
+        Build one source context per character budget from distinct chunks
+
+        The best chunks are dealt round-robin so every group gets a share of the most
+        informative material, then each group is reassembled in document order.
+
+        Args:
+            budgets (Sequence[int]): Character budget of each context (one per question batch)
+            query (str): Optional query to focus selection
+
+        Returns:
+            List[str]: One context string per budget
+        """
+        num_groups = len(budgets)
+        if not self.chunks:
+            return [""] * num_groups
+
+        average_chars = sum(map(len, self.chunks)) / len(self.chunks)
+        slots = [max(1, int(budget // max(average_chars, 1))) for budget in budgets]
+        ranked = self.select(sum(slots), query=query)
+        # With fewer chunks than slots, groups share chunks rather than go empty
+        while len(ranked) < sum(slots):
+            ranked = ranked + ranked
+
+        groups = [[] for _ in budgets]
+        position = 0
+        while position < sum(slots):
+            for group, members in enumerate(groups):
+                if len(members) < slots[group] and position < len(ranked):
+                    members.append(ranked[position])
+                    position += 1
+
+        contexts = []
+        for members, max_chars in zip(groups, budgets):
+            parts, used = [], 0
+            for index in sorted(set(members)):
+                chunk = self.chunks[index]
+                if parts and used + len(chunk) + 2 > max_chars:
+                    continue
+                parts.append(chunk[:max_chars])
+                used += len(parts[-1]) + 2
+            contexts.append("\n\n".join(parts))
+        return contexts
+
+    def _column_sums(self, columns, factors, values) -> np.ndarray:
+        """Per-chunk sum of factor * value over the postings of the given term columns"""
+        if len(columns) == 0:
+            return np.zeros(len(self.chunks), dtype=np.float32)
+        starts, ends = self._col_ptr[columns], self._col_ptr[np.asarray(columns) + 1]
+        rows = np.concatenate([self._col_rows[start:end] for start, end in zip(starts, ends)])
+        contributions = np.concatenate([
+            factor * values[start:end] for factor, start, end in zip(factors, starts, ends)
+        ])
+        return np.bincount(rows, weights=contributions, minlength=len(self.chunks)).astype(np.float32)
+
+    def _query_scores(self, query: str) -> np.ndarray:
+        """BM25 score of every chunk against a query"""
+        terms = [(self.vocabulary[term], count) for term, count in Counter(tokenize(query)).items() if term in self.vocabulary]
+        return self._column_sums([column for column, _ in terms], [count for _, count in terms], self._col_weights)
+
+    def _similarities(self, index: int) -> np.ndarray:
+        """Cosine similarity of one chunk to every chunk"""
+        start, end = self._row_ptr[index], self._row_ptr[index + 1]
+        return self._column_sums(self._row_cols[start:end], self._row_unit[start:end], self._col_unit)
+
+    @staticmethod
+    def _rescale(scores: np.ndarray) -> np.ndarray:
+        """Min-max scale scores to [0, 1] so they mix with cosine similarities"""
+        low, high = float(scores.min(initial=0.0)), float(scores.max(initial=0.0))
+        if high - low <= 0:
+            return np.zeros_like(scores, dtype=np.float32)
+        return ((scores - low) / (high - low)).astype(np.float32)
+
+
+# Memoized indexes, most recently used last, bounded by their estimated size
+INDEX_CACHE_BYTES = 64 * 1024 * 1024
+_index_cache: "OrderedDict[Tuple[str, int, int], ChunkIndex]" = OrderedDict()
+_index_cache_bytes = 0
+_index_cache_lock = threading.Lock()
+
+
+def build_index(text: str, chunk_chars: int = 1500, overlap_chars: int = 200) -> ChunkIndex:
+    """Chunk and index a document, memoized so repeated quizzes on one document reuse the index"""
+    global _index_cache_bytes
+    key = (text, chunk_chars, overlap_chars)
+    with _index_cache_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+
+    index = ChunkIndex(chunk_text(text, chunk_chars, overlap_chars))
+    size = index.size_bytes()
+    with _index_cache_lock:
+        if key not in _index_cache and size <= INDEX_CACHE_BYTES:
+            _index_cache[key] = index
+            _index_cache_bytes += size
+            while _index_cache_bytes > INDEX_CACHE_BYTES:
+                _, evicted = _index_cache.popitem(last=False)
+                _index_cache_bytes -= evicted.size_bytes()
+    return index